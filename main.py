@@ -3,8 +3,9 @@ from module import firstLLM
 import shutil
 from tempfile import NamedTemporaryFile
 from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from module.audio_extraction import convert_webm_to_mp3
 # from module.whisper_medium import transcribe_audio
 from module.whisper_api import transcribe_audio
@@ -12,10 +13,13 @@ from module.ai_presenter import fetch_result_url
 import io
 import os
 import uuid
+import time
 import cv2
 import base64
 import numpy as np
 from module.guide import process_frame
+from module.pose_session import update_session, get_session_feedback, clear_session
+from module.frame_quality import FrameQualityController, parse_client_message
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from module.llm_openai import follow_Q
@@ -37,16 +41,19 @@ from module.indexClear import delete_docs
 from rag.rag_createNew import create_newQ
 from rag.rag_evaluateNew import evaluate_newQ
 from module.openai_contentSummary import summaryOfContent
-from module.pdfSave import main
+from module.pdfSave import main_batch
 from module.openai_pdf import pdf
-from module.pdfSearch import search
 from rag.rag_followUp import ragFollwUp
 from module.openai_answerJudgment import answerJudgment
 from module.openai_answerOrganize import answerOraganize
 from typing import Optional
-from module.search_resumes import search_result 
+from module.search_resumes import search_page, decode_cursor, KNN_K, PAGE_SIZE
+from module.search_cache import bump_generation, get_stats as get_search_cache_stats
 from module.pdfSave_vector import add_resumes
 from module.openai_filter import get_work_experience
+from module.embedding_cache import get_stats as get_embedding_cache_stats
+from module.bert_embedding import get_batch_stats as get_embedding_batch_stats
+from module.search_diagnostics import DIAGNOSTICS_HEADER, request_diagnostics, reset_diagnostics
 app = FastAPI()
 
 @app.get("/")
@@ -61,12 +68,21 @@ app.add_middleware(
     allow_headers=["*"],  # 필요한 헤더를 설정합니다
 )
 
+# X-Search-Diagnostics 헤더가 있는 요청만 검색 explain/profile 을 수집
+@app.middleware("http")
+async def search_diagnostics_middleware(request: Request, call_next):
+    token = request_diagnostics(request.headers.get(DIAGNOSTICS_HEADER))
+    try:
+        return await call_next(request)
+    finally:
+        reset_diagnostics(token)
+
 # 오디오 파일을 저장할 폴더를 확인하고, 없으면 생성합니다.
 if not os.path.exists('audio'):
     os.makedirs('audio')
 
 @app.post("/process_audio")
-async def process_audio(file: UploadFile = File(...)):
+async def process_audio(file: UploadFile = File(...), session_id: Optional[str] = Form(None)):
     try:
         # 업로드된 파일을 메모리에서 직접 처리
         webm_file = io.BytesIO(await file.read())
@@ -75,9 +91,16 @@ async def process_audio(file: UploadFile = File(...)):
         unique_filename = f"{uuid.uuid4().hex}.mp3"
         audio_output_path = os.path.join("audio", unique_filename)
 
+        # /ws 세션에서 누적된 포즈 통계가 있으면 영상 포즈 분석을 건너뜀 (변환/전사 실패 후 재시도할 수 있도록 아직 지우지 않음)
+        session_feedback = get_session_feedback(session_id)
+
         # webm 파일을 mp3로 변환
         # feedback, face_touch_total, hand_move_total, not_front_total = convert_webm_to_mp3(webm_file, audio_output_path)
-        feedback = convert_webm_to_mp3(webm_file, audio_output_path)
+        if session_feedback is not None:
+            convert_webm_to_mp3(webm_file, audio_output_path, analyze_pose=False)
+            feedback = session_feedback
+        else:
+            feedback = convert_webm_to_mp3(webm_file, audio_output_path)
         print("feedback(main.py): ", feedback)
         
         # MP3 파일을 텍스트로 변환
@@ -89,6 +112,9 @@ async def process_audio(file: UploadFile = File(...)):
 
         print("@@@@@추출된 답변", transcript)
 
+        # 업로드 처리가 끝났으므로 세션 통계 정리
+        clear_session(session_id)
+
         return JSONResponse(content={
             "status": "success",
             "message": "MP3 파일의 텍스트가 추출되었습니다.",
@@ -248,11 +274,12 @@ async def follow_question(job: str = Form(...), type: str = Form(...), answers:
         return JSONResponse(content=resultOfSummary)
     
     else:
-        result = answerJudgment(questionsRag, answerRag, type)
+        # 동시 요청의 질의 임베딩이 마이크로 배치로 묶이도록 스레드풀에서 실행
+        result = await run_in_threadpool(answerJudgment, questionsRag, answerRag, type)
         print("결과" + result)
 
         if result == "Yes":
-            rag_result = ragFollwUp(job, type, questionsRag, answerRag)
+            rag_result = await run_in_threadpool(ragFollwUp, job, type, questionsRag, answerRag)
             rag = "Yes"
 
             return JSONResponse(content={
@@ -283,7 +310,7 @@ async def follow_evaluete(
     if answerKey == 'A9' or (answerKey == 'A10' and rag != "Yes"):
         result = assessment_each(question, answer, years, job, type)
     elif answerKey == 'A10' and rag == "Yes":
-        result = evaluate_newQ(question, answer, years, job, type)
+        result = await run_in_threadpool(evaluate_newQ, question, answer, years, job, type)
     else:
         raise HTTPException(status_code=400, detail="잘못된 질문 키입니다.")
 
@@ -386,24 +413,35 @@ async def speaking(input: AnswersInput):
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
+    # 같은 면접의 /process_audio 업로드와 포즈 통계를 공유하기 위한 세션 id
+    session_id = websocket.query_params.get("session_id")
+    # 세션별 지연 시간을 측정해 캡처 해상도/프레임레이트/JPEG 품질을 조정
+    quality = FrameQualityController()
     try:
         while True:
             data = await websocket.receive_text()
 
             try:
-                img_data = base64.b64decode(data.split(',')[1])
+                image_url, ack, held_ms = parse_client_message(data)
+                quality.record_ack(ack, held_ms)
+                started = time.perf_counter()
+
+                img_data = base64.b64decode(image_url.split(',')[1])
                 nparr = np.frombuffer(img_data, np.uint8)
-                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+                frame = quality.fit_frame(cv2.imdecode(nparr, cv2.IMREAD_COLOR))
                 
-                processed_frame, success_flag = process_frame(frame)
+                processed_frame, success_flag, pose_landmarks = process_frame(frame)
+                update_session(session_id, pose_landmarks)
                 
-                _, buffer = cv2.imencode('.jpg', processed_frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+                _, buffer = cv2.imencode('.jpg', processed_frame, quality.encode_params())
                 processed_image = base64.b64encode(buffer).decode('utf-8')
+
+                quality.record_server_time((time.perf_counter() - started) * 1000)
                 
-                await websocket.send_json({
+                await websocket.send_json(quality.annotate({
                     "image": f"data:image/jpeg;base64,{processed_image}",
                     "success": success_flag
-                })
+                }))
             except Exception as e:
                 (f"Error processing frame: {str(e)}")
     except Exception as e:
@@ -522,7 +560,7 @@ async def newQuestion_create(job: str = Form(...), type: str = Form(...), answer
     print("요약 답변: ", resultOfSummary["Summary"])
     summaryOfAnswers = resultOfSummary.get('Summary', '')
 
-    result = create_newQ(job, type, summaryOfAnswers)
+    result = await run_in_threadpool(create_newQ, job, type, summaryOfAnswers)
 
     return JSONResponse(content=result)
 
@@ -537,20 +575,21 @@ async def newQuestion_evaluete(
     if not question or not answer or not years or not job or not type:
         raise HTTPException(status_code=400, detail="필수 입력 항목을 확인해주세요.")
     
-    result = evaluate_newQ(question, answer, years, job, type)
+    result = await run_in_threadpool(evaluate_newQ, question, answer, years, job, type)
 
     return JSONResponse(content={"evaluation": result})
 
 @app.post("/reset_index")
 async def delete_resumes_nori():
     delete_docs()
+    # 캐시된 검색 결과 무효화
+    bump_generation()
 
     return ("삭제완료")
 
 @app.post("/pdf")
 async def create_upload_files(files: list[UploadFile] = File(...), sources: List[str] = Form(...)):
     pdf_contents = []
-    results = []
 
     # 업로드된 PDF 파일 처리
     for file in files:
@@ -561,12 +600,11 @@ async def create_upload_files(files: list[UploadFile] = File(...), sources: List
                 pdf_contents.append(temp_file.name)
 
     # 각 PDF에 대해 텍스트 추출 및 JSON 변환
+    extracted = []
     for pdf_content, source in zip(pdf_contents, sources):
         # PDF 함수가 비동기 함수라면 await로 호출
         result = await pdf(pdf_content)
-
-        # PDF 파일 저장
-        main(result, source)
+        extracted.append((result, source))
         
         add_resumes(pdf_content,source)
         # PDF 파일 삭제
@@ -576,21 +614,39 @@ async def create_upload_files(files: list[UploadFile] = File(...), sources: List
         except Exception as e:
             print(f"PDF 파일 삭제 실패: {e}")
 
-    await asyncio.sleep(3)
+    # 업로드된 이력서 전체를 배치 임베딩 후 저장, 저장한 프로필로 바로 응답 (refresh 완료 후 반환)
+    results = await run_in_threadpool(main_batch, extracted)
+    # 새 이력서가 반영되도록 캐시된 검색 결과 무효화
+    bump_generation()
 
-    for source in sources:
-        info = await search(source)
-        results.append(info)
-    
     # 결과 반환
     return JSONResponse(results)
 
 @app.post("/search_resumes")
-async def search_resumes_fasttext(query: str = Form(...)):
-   print(search_result(query))
-   return search_result(query)
+async def search_resumes_fasttext(query: str = Form(...), limit: int = Form(PAGE_SIZE), search_after: Optional[str] = Form(None)):
+    # 이력서당 하나씩 limit 개, 다음 페이지는 응답의 next_cursor 를 search_after 로 전달
+    limit = max(1, min(limit, KNN_K))
+    try:
+        decode_cursor(search_after)
+    except (ValueError, KeyError, TypeError, OverflowError):
+        raise HTTPException(status_code=400, detail="잘못된 search_after 값입니다.")
+
+    page = await run_in_threadpool(search_page, query, limit, search_after)
+    return ORJSONResponse(page)
 
 @app.post("/career_filter")
 async def career_filter(career_options: List = Form(...)):
+    # 선택한 구간의 이력서 목록과 구간별 이력서 수
+    return await run_in_threadpool(get_work_experience, career_options)
+
+@app.get("/embedding_cache_stats")
+async def embedding_cache_stats():
+    return get_embedding_cache_stats()
+
+@app.get("/embedding_batch_stats")
+async def embedding_batch_stats():
+    return get_embedding_batch_stats()
 
-    return get_work_experience(career_options)
+@app.get("/search_cache_stats")
+async def search_cache_stats():
+    return get_search_cache_stats()
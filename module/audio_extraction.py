@@ -4,12 +4,13 @@ import os
 import cv2
 import mediapipe as mp
 from module.check_distance import analyze_video_landmarks
-def convert_webm_to_mp3(webm_file: io.BytesIO, mp3_path: str):
+def convert_webm_to_mp3(webm_file: io.BytesIO, mp3_path: str, analyze_pose: bool = True):
     """
     메모리에서 webm 파일을 mp3 형식으로 변환하고 포즈를 분석합니다.
     :param webm_file: 메모리에서의 webm 파일
     :param mp3_path: 변환할 mp3 파일의 경로
-    :return: 중복이 제거된 포즈 분석 피드백
+    :param analyze_pose: False 이면 오디오 변환만 수행 (실시간 세션 통계가 있는 경우)
+    :return: 중복이 제거된 포즈 분석 피드백 (analyze_pose=False 이면 None)
     """
     # 웹엠 파일을 임시로 저장할 폴더 확인
     temp_webm_path = 'audio/temp_video.webm'
@@ -26,6 +27,10 @@ def convert_webm_to_mp3(webm_file: io.BytesIO, mp3_path: str):
     ]
     subprocess.run(command, check=True)
 
+    if not analyze_pose:
+        os.remove(temp_webm_path)
+        return None
+
     # BlazePose 복잡도 선택, 명시하지 않으면 디폴트 값 1
     MODEL_COMPLEXITY = {
         "LITE": 0,
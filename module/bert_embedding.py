@@ -0,0 +1,233 @@
+import os
+import sys
+import time
+import numpy as np
+import torch
+from transformers import BertTokenizer, BertTokenizerFast, BertModel
+from module.embedding_cache import cached_encode
+from module.embedding_batcher import EmbeddingBatcher
+
+# BERT 모델 설정
+MODEL_NAME = 'bert-base-uncased'
+MAX_LENGTH = 512  # BERT 최대 입력 길이, 넘는 부분은 잘라냄
+BATCH_SIZE = int(os.getenv("BERT_BATCH_SIZE", 32))
+
+# 임베딩 백엔드 설정
+# - torch: fp32 PyTorch (기존과 동일한 벡터)
+# - torch_int8: Linear 레이어를 동적 int8 양자화한 PyTorch
+# - onnx: ONNX Runtime fp32
+# - onnx_int8: ONNX Runtime 동적 int8 양자화
+BACKEND = os.getenv("EMBEDDER_BACKEND", "torch")
+FAST_TOKENIZER = os.getenv("EMBEDDER_FAST_TOKENIZER", "true").lower() == "true"
+THREADS = int(os.getenv("EMBEDDER_THREADS", 0))  # 0 이면 라이브러리 기본값
+ONNX_DIR = os.getenv("EMBEDDER_ONNX_DIR", "models/onnx")
+
+# fp32 CLS 벡터와의 코사인 유사도 허용 하한
+PARITY_MIN_COSINE = float(os.getenv("EMBEDDER_PARITY_MIN_COSINE", 0.99))
+
+
+def load_tokenizer(fast=FAST_TOKENIZER):
+    tokenizer_class = BertTokenizerFast if fast else BertTokenizer
+    return tokenizer_class.from_pretrained(MODEL_NAME)
+
+
+class TorchBackend:
+    """
+    PyTorch eager 백엔드, quantize=True 이면 Linear 레이어를 int8 로 동적 양자화
+    """
+
+    def __init__(self, tokenizer, quantize=False, threads=THREADS):
+        if threads:
+            torch.set_num_threads(threads)
+        self.tokenizer = tokenizer
+        model = BertModel.from_pretrained(MODEL_NAME)
+        model.eval()
+        if quantize:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model
+        self.hidden_size = model.config.hidden_size
+
+    def encode(self, texts, max_length):
+        inputs = self.tokenizer(texts, return_tensors='pt', padding=True, truncation=True, max_length=max_length)
+        with torch.inference_mode():
+            outputs = self.model(**inputs)
+        return outputs.last_hidden_state[:, 0, :].numpy()
+
+
+class OnnxBackend:
+    """
+    ONNX Runtime 백엔드, 모델 파일이 없으면 최초 실행 시 내보내기(및 양자화)를 수행
+    """
+
+    def __init__(self, tokenizer, quantize=False, threads=THREADS):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("onnx 백엔드를 사용하려면 onnxruntime 패키지를 설치해야 합니다.")
+
+        self.tokenizer = tokenizer
+        model_path = export_onnx(quantize)
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.hidden_size = self.session.get_outputs()[0].shape[-1]
+
+    def encode(self, texts, max_length):
+        inputs = self.tokenizer(texts, return_tensors='np', padding=True, truncation=True, max_length=max_length)
+        feed = {name: value.astype(np.int64) for name, value in inputs.items() if name in self.input_names}
+        last_hidden_state = self.session.run(["last_hidden_state"], feed)[0]
+        return last_hidden_state[:, 0, :]
+
+
+def export_onnx(quantize=False):
+    """
+    bert-base-uncased 를 ONNX 로 내보내고, quantize=True 이면 int8 로 동적 양자화합니다.
+    :return: 모델 파일 경로
+    """
+    os.makedirs(ONNX_DIR, exist_ok=True)
+    fp32_path = os.path.join(ONNX_DIR, f"{MODEL_NAME}.onnx")
+    int8_path = os.path.join(ONNX_DIR, f"{MODEL_NAME}.int8.onnx")
+
+    if not os.path.exists(fp32_path):
+        model = BertModel.from_pretrained(MODEL_NAME)
+        model.eval()
+        dummy = load_tokenizer()(["hello world"], return_tensors='pt')
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in ["input_ids", "attention_mask", "token_type_ids", "last_hidden_state"]}
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+        print(f"ONNX 모델 내보내기 완료: {fp32_path}")
+
+    if not quantize:
+        return fp32_path
+
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        print(f"ONNX int8 양자화 완료: {int8_path}")
+    return int8_path
+
+
+BACKENDS = {
+    "torch": lambda tokenizer: TorchBackend(tokenizer),
+    "torch_int8": lambda tokenizer: TorchBackend(tokenizer, quantize=True),
+    "onnx": lambda tokenizer: OnnxBackend(tokenizer),
+    "onnx_int8": lambda tokenizer: OnnxBackend(tokenizer, quantize=True),
+}
+
+def load_backend(name=BACKEND, fast_tokenizer=FAST_TOKENIZER):
+    if name not in BACKENDS:
+        raise ValueError(f"지원하지 않는 임베딩 백엔드입니다: {name} ({', '.join(BACKENDS)})")
+    return BACKENDS[name](load_tokenizer(fast_tokenizer))
+
+
+# 백엔드/토크나이저마다 벡터가 조금씩 다르므로 캐시 키에 백엔드와 토크나이저 종류를 포함
+MODEL_ID = f'bert:{MODEL_NAME}:cls:{BACKEND}:{"fast" if FAST_TOKENIZER else "slow"}'
+backend = load_backend()
+
+def _encode(texts, batch_size, max_length, encoder=None):
+    # 길이가 비슷한 텍스트끼리 묶어 패딩을 줄이고, 결과는 입력 순서대로 반환
+    encoder = encoder or backend
+    vectors = np.empty((len(texts), encoder.hidden_size), dtype=np.float32)
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+
+    for start in range(0, len(order), batch_size):
+        batch_indices = order[start:start + batch_size]
+        vectors[batch_indices] = encoder.encode([texts[i] for i in batch_indices], max_length)
+
+    return vectors
+
+def get_vectors(texts, batch_size=BATCH_SIZE, max_length=MAX_LENGTH):
+    """
+    여러 텍스트를 패딩 배치로 묶어 CLS 벡터로 변환합니다. 캐시에 있는 텍스트는 다시 인코딩하지 않습니다.
+    :return: (len(texts), 768) 크기의 numpy 배열
+    """
+    return cached_encode(MODEL_ID, list(texts), lambda missing: _encode(missing, batch_size, max_length))
+
+# 동시에 들어오는 질의 임베딩을 모아 한 번의 배치로 처리
+query_batcher = EmbeddingBatcher(lambda texts: _encode(texts, len(texts), MAX_LENGTH))
+
+def get_vector(text):
+    """
+    질의 한 건을 벡터로 변환합니다. 캐시에 없으면 마이크로 배치 큐를 거칩니다.
+    """
+    return cached_encode(MODEL_ID, [text], query_batcher.embed_many)[0]
+
+def get_batch_stats():
+    return query_batcher.stats()
+
+
+# 기본 점검용 문장 (실제 면접 질문/답변과 비슷한 길이)
+SAMPLE_TEXTS = [
+    "Spring Boot 와 Django 의 차이점에 대해 설명해 주세요.",
+    "최근 관심 있게 본 새로운 기술이나 논문이 있나요?",
+    "Kubernetes 환경에서 무중단 배포를 구성한 경험을 말씀해 주세요.",
+    "MLOps 플랫폼이 개발자 커뮤니티에 미치는 긍정적인 영향은 무엇이라고 생각하시나요?",
+    "팀원과 의견이 충돌했을 때 어떻게 해결하셨나요?",
+    "Transformer attention mechanism and its computational complexity",
+]
+
+def parity_report(name, fast_tokenizer=FAST_TOKENIZER, texts=SAMPLE_TEXTS):
+    """
+    fp32 PyTorch + 기본(slow) 토크나이저 CLS 벡터 대비 지정한 백엔드/토크나이저의 코사인 유사도를 계산합니다.
+    :return: {"min_cosine", "mean_cosine", "passed"}
+    """
+    reference = _encode(texts, BATCH_SIZE, MAX_LENGTH, TorchBackend(load_tokenizer(fast=False)))
+    candidate = _encode(texts, BATCH_SIZE, MAX_LENGTH, load_backend(name, fast_tokenizer))
+
+    cosine = np.sum(reference * candidate, axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    )
+    report = {
+        "backend": name,
+        "fast_tokenizer": fast_tokenizer,
+        "min_cosine": float(cosine.min()),
+        "mean_cosine": float(cosine.mean()),
+        "passed": bool(cosine.min() >= PARITY_MIN_COSINE)
+    }
+    print(f"[parity] {report}")
+    return report
+
+def benchmark(name, texts=SAMPLE_TEXTS, repeats=20):
+    """
+    단일 질의 임베딩 지연 시간(ms)을 측정합니다. (캐시를 거치지 않음)
+    """
+    encoder = load_backend(name)
+    encoder.encode([texts[0]], MAX_LENGTH)  # 워밍업
+
+    latencies = []
+    for _ in range(repeats):
+        for text in texts:
+            start = time.perf_counter()
+            encoder.encode([text], MAX_LENGTH)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies = np.array(latencies)
+    report = {
+        "backend": name,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "mean_ms": float(latencies.mean())
+    }
+    print(f"[benchmark] {report}")
+    return report
+
+# python -m module.bert_embedding [백엔드 ...]
+if __name__ == '__main__':
+    names = sys.argv[1:] or list(BACKENDS)
+    failed = False
+    for backend_name in names:
+        benchmark(backend_name)
+        # 기준(torch + slow 토크나이저)과 같은 설정만 건너뜀
+        if backend_name != "torch" or FAST_TOKENIZER:
+            failed |= not parity_report(backend_name)["passed"]
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,84 @@
+import os
+import time
+from itertools import islice
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from elasticsearch import helpers
+
+# 벌크 요청 설정
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", 500))  # 요청 하나에 담을 최대 문서 수
+BULK_MAX_CHUNK_BYTES = int(os.getenv("BULK_MAX_CHUNK_BYTES", 10 * 1024 * 1024))  # 요청 하나의 최대 크기
+BULK_IN_FLIGHT = int(os.getenv("BULK_IN_FLIGHT", 1))  # 동시에 보낼 벌크 요청 수
+# 429 (Too Many Requests) 응답을 받은 문서의 재시도 설정
+BULK_MAX_RETRIES = int(os.getenv("BULK_MAX_RETRIES", 3))
+BULK_INITIAL_BACKOFF = float(os.getenv("BULK_INITIAL_BACKOFF", 2))
+BULK_MAX_BACKOFF = float(os.getenv("BULK_MAX_BACKOFF", 60))
+# 배치마다 출력할 실패 항목 수
+MAX_REPORTED_ERRORS = 3
+
+
+def _send_batch(es, batch, max_chunk_bytes, **kwargs):
+    # 배치 하나를 전송하고 (성공 수, 실패 항목 리스트) 반환, 429 는 streaming_bulk 가 백오프 후 재시도
+    success, errors = 0, []
+    for ok, item in helpers.streaming_bulk(
+        es,
+        batch,
+        chunk_size=len(batch),
+        max_chunk_bytes=max_chunk_bytes,
+        raise_on_error=False,
+        raise_on_exception=False,
+        max_retries=BULK_MAX_RETRIES,
+        initial_backoff=BULK_INITIAL_BACKOFF,
+        max_backoff=BULK_MAX_BACKOFF,
+        **kwargs
+    ):
+        if ok:
+            success += 1
+        else:
+            errors.append(item)
+    return success, errors
+
+def _batches(actions, chunk_size):
+    actions = iter(actions)
+    while True:
+        batch = list(islice(actions, chunk_size))
+        if not batch:
+            return
+        yield batch
+
+def write_bulk(es, actions, label="bulk", chunk_size=BULK_CHUNK_SIZE, max_chunk_bytes=BULK_MAX_CHUNK_BYTES,
+               in_flight=BULK_IN_FLIGHT, **kwargs):
+    """
+    문서 action 들을 배치로 나눠 벌크 전송합니다. 배치마다 실패 항목을 출력합니다.
+    :param actions: 벌크 action (리스트 또는 제너레이터, 제너레이터는 전송하면서 만들어짐)
+    :param in_flight: 동시에 전송 중인 벌크 요청의 최대 수
+    :param kwargs: 벌크 요청 파라미터 (예: refresh="wait_for")
+    :return: (성공 수, 실패 수)
+    """
+    start_time = time.time()
+    success, failed = 0, 0
+
+    def report(batch_no, future):
+        nonlocal success, failed
+        batch_success, errors = future.result()
+        success += batch_success
+        failed += len(errors)
+        if errors:
+            print(f"[{label}] 배치 {batch_no}: {batch_success}개 성공, {len(errors)}개 실패 {errors[:MAX_REPORTED_ERRORS]}")
+
+    with ThreadPoolExecutor(max_workers=max(in_flight, 1)) as executor:
+        pending = deque()
+        # 제너레이터 action 은 다음 배치를 만드는 동안 이전 배치가 전송됨
+        for batch_no, batch in enumerate(_batches(actions, chunk_size), start=1):
+            # 전송 중인 요청이 가득 차면 가장 오래된 요청이 끝날 때까지 대기
+            if len(pending) >= in_flight:
+                report(*pending.popleft())
+            pending.append((batch_no, executor.submit(_send_batch, es, batch, max_chunk_bytes, **kwargs)))
+        while pending:
+            report(*pending.popleft())
+
+    elapsed = time.time() - start_time
+    total = success + failed
+    rate = total / elapsed if elapsed > 0 else 0
+    print(f"[{label}] 인덱싱 완료: {success}개 성공, {failed}개 실패 ({elapsed:.2f}초, {rate:.1f} docs/sec)")
+    return success, failed
@@ -0,0 +1,9 @@
+import hashlib
+
+def doc_id(*parts):
+    """
+    문서 내용에서 항상 같은 _id 를 만듭니다. 같은 문서를 다시 저장하면 덮어쓰고, 동시에 저장해도 겹치지 않습니다.
+    :param parts: _id 를 구성하는 값들 (예: source, key, 순번)
+    :return: sha1 hex 문자열
+    """
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
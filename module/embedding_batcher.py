@@ -0,0 +1,144 @@
+import os
+import time
+import queue
+import threading
+from bisect import bisect_left
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+
+# 마이크로 배치 설정
+BATCH_WINDOW_MS = float(os.getenv("EMBEDDER_BATCH_WINDOW_MS", 5))  # 요청을 모으는 최대 대기 시간
+MAX_BATCH_SIZE = int(os.getenv("EMBEDDER_MAX_BATCH_SIZE", 32))
+
+# 히스토그램 구간 (상한값 기준)
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128]
+QUEUE_WAIT_BUCKETS_MS = [0.5, 1, 2, 5, 10, 20, 50, 100, 250]
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 마지막 칸은 +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def snapshot(self):
+        labels = [str(bucket) for bucket in self.buckets] + ["+Inf"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0
+        }
+
+
+class EmbeddingBatcher:
+    """
+    동시에 들어온 임베딩 요청을 짧은 시간 동안 모아 한 번의 패딩 배치로 처리하고
+    각 호출자의 Future 를 결과로 채웁니다.
+    """
+
+    def __init__(self, encode_fn, max_batch_size=MAX_BATCH_SIZE, window_ms=BATCH_WINDOW_MS):
+        """
+        :param encode_fn: 텍스트 리스트를 받아 (n, dim) 배열을 반환하는 함수
+        """
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_BUCKETS_MS)
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text):
+        future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def embed(self, text):
+        return self.submit(text).result()
+
+    def embed_many(self, texts):
+        futures = [self.submit(text) for text in texts]
+        return np.stack([future.result() for future in futures])
+
+    def _collect(self):
+        # 첫 요청이 들어오면 window 동안 또는 max_batch_size 까지 요청을 모음
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            with self._lock:
+                self.batch_sizes.observe(len(batch))
+                for _, _, enqueued in batch:
+                    self.queue_wait_ms.observe((started - enqueued) * 1000)
+
+            try:
+                vectors = self.encode_fn([text for text, _, _ in batch])
+                for (_, future, _), vector in zip(batch, vectors):
+                    future.set_result(vector)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "batch_size": self.batch_sizes.snapshot(),
+                "queue_wait_ms": self.queue_wait_ms.snapshot(),
+                "pending": self._queue.qsize()
+            }
+
+
+def load_test(embed_fn, texts, concurrency=16, total_requests=256):
+    """
+    concurrency 개의 스레드로 embed_fn 을 동시에 호출해 처리량과 지연 시간을 측정합니다.
+    """
+    def timed_call(i):
+        start = time.perf_counter()
+        embed_fn(texts[i % len(texts)])
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = np.array(list(executor.map(timed_call, range(total_requests))))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "throughput_rps": total_requests / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99))
+    }
+
+# python -m module.embedding_batcher : 단건 처리와 마이크로 배치 처리 비교
+if __name__ == '__main__':
+    from module.bert_embedding import backend, MAX_LENGTH, SAMPLE_TEXTS
+
+    # 캐시를 거치지 않도록 매 요청마다 다른 문장을 만듦
+    texts = [f"{text} ({i})" for i in range(64) for text in SAMPLE_TEXTS]
+
+    unbatched = load_test(lambda text: backend.encode([text], MAX_LENGTH)[0], texts)
+    print(f"[unbatched] {unbatched}")
+
+    batcher = EmbeddingBatcher(lambda batch: backend.encode(batch, MAX_LENGTH))
+    batched = load_test(batcher.embed, texts)
+    print(f"[batched] {batched}")
+    print(f"[batcher stats] {batcher.stats()}")
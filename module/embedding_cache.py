@@ -0,0 +1,189 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# 캐시 설정
+CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "cache/embeddings.sqlite3")
+MEMORY_ITEMS = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", 10000))  # 메모리 LRU 최대 항목 수
+DISK_ITEMS = int(os.getenv("EMBEDDING_CACHE_DISK_ITEMS", 500000))  # 디스크(SQLite) 최대 항목 수
+EVICT_CHECK_INTERVAL = 1000  # 이만큼 저장할 때마다 디스크 용량 확인
+
+# 공백을 정리해서 같은 문장이 같은 키를 갖도록 함
+def normalize_text(text):
+    return ' '.join(str(text).split())
+
+def text_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    (모델 id, 정규화된 텍스트 해시) 를 키로 하는 2단계 임베딩 캐시
+    - 1단계: 프로세스 내 LRU (OrderedDict)
+    - 2단계: SQLite 파일, last_used 기준으로 오래된 항목부터 삭제
+    """
+
+    def __init__(self, path=CACHE_PATH, memory_items=MEMORY_ITEMS, disk_items=DISK_ITEMS):
+        self.memory_items = memory_items
+        self.disk_items = disk_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts_since_check = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "disk_evictions": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model_id TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model_id, text_hash)
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._db.commit()
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model_id, hashes):
+        """
+        :return: hashes 와 같은 순서의 벡터 리스트 (없는 항목은 None)
+        """
+        results = [None] * len(hashes)
+        disk_lookup = {}
+
+        with self._lock:
+            for i, h in enumerate(hashes):
+                key = (model_id, h)
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    results[i] = self._memory[key]
+                    self._stats["memory_hits"] += 1
+                else:
+                    disk_lookup.setdefault(h, []).append(i)
+
+            if disk_lookup:
+                found = []
+                lookup_hashes = list(disk_lookup)
+                # SQLite 변수 개수 제한을 피하기 위해 나눠서 조회
+                for start in range(0, len(lookup_hashes), 500):
+                    part = lookup_hashes[start:start + 500]
+                    placeholders = ','.join('?' * len(part))
+                    found.extend(self._db.execute(
+                        f"SELECT text_hash, vector FROM embeddings WHERE model_id = ? AND text_hash IN ({placeholders})",
+                        [model_id, *part]
+                    ).fetchall())
+
+                now = time.time()
+                for h, blob in found:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    self._remember((model_id, h), vector)
+                    for i in disk_lookup[h]:
+                        results[i] = vector
+                        self._stats["disk_hits"] += 1
+                if found:
+                    self._db.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE model_id = ? AND text_hash = ?",
+                        [(now, model_id, h) for h, _ in found]
+                    )
+                    self._db.commit()
+
+            self._stats["misses"] += sum(1 for vector in results if vector is None)
+
+        return results
+
+    def put_many(self, model_id, hashes, vectors):
+        now = time.time()
+        rows = []
+        with self._lock:
+            for h, vector in zip(hashes, vectors):
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember((model_id, h), vector)
+                rows.append((model_id, h, vector.tobytes(), now))
+
+            self._db.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            self._db.commit()
+
+            self._puts_since_check += len(rows)
+            if self._puts_since_check >= EVICT_CHECK_INTERVAL:
+                self._puts_since_check = 0
+                self._evict_disk()
+
+    def _evict_disk(self):
+        count = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if count <= self.disk_items:
+            return
+        # 최대 크기의 90% 까지 오래된 항목부터 삭제
+        overflow = count - int(self.disk_items * 0.9)
+        self._db.execute(
+            "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+            (overflow,)
+        )
+        self._db.commit()
+        self._stats["disk_evictions"] += overflow
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_items"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache()
+    return _cache
+
+def cached_encode(model_id, texts, encode_fn):
+    """
+    캐시에 없는 텍스트만 encode_fn 으로 한 번에 임베딩합니다.
+    :param model_id: 모델 식별자 (모델마다 다른 벡터 공간이므로 키에 포함)
+    :param texts: 임베딩할 텍스트 리스트
+    :param encode_fn: 정규화된 텍스트 리스트를 받아 (n, dim) 배열을 반환하는 함수
+    :return: (len(texts), dim) float32 배열
+    """
+    normalized = [normalize_text(text) for text in texts]
+    if not normalized:
+        return np.empty((0, 0), dtype=np.float32)
+
+    hashes = [text_hash(text) for text in normalized]
+    cache = get_cache()
+    vectors = cache.get_many(model_id, hashes)
+
+    # 같은 요청 안에서 중복된 텍스트는 한 번만 임베딩
+    missing = OrderedDict()
+    for i, vector in enumerate(vectors):
+        if vector is None:
+            missing.setdefault(hashes[i], normalized[i])
+
+    if missing:
+        encoded = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+        cache.put_many(model_id, list(missing.keys()), encoded)
+        computed = dict(zip(missing.keys(), encoded))
+        vectors = [computed[h] if vector is None else vector for h, vector in zip(hashes, vectors)]
+
+    return np.stack(vectors)
+
+def get_stats():
+    return get_cache().stats()
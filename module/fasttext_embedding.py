@@ -0,0 +1,98 @@
+import re
+import fasttext
+import fasttext.util
+import numpy as np
+from module.embedding_cache import cached_encode
+
+# FastText 한국어 모델 로드 (프로세스당 한 번)
+fasttext.util.download_model('ko', if_exists='ignore')
+ft_model = fasttext.load_model('cc.ko.300.bin')
+
+MODEL_ID = 'fasttext:cc.ko.300'
+
+# fastText(C++ istream) 와 같은 기준으로 공백 분리
+TOKEN_PATTERN = re.compile(r'[^ \t\n\v\f\r]+')
+# 단어 -> 입력 행렬 행 번호(단어 + subword n-gram) 캐시 최대 크기
+MAX_CACHED_WORDS = 200000
+
+_input_matrix = None
+_word_rows = {}
+
+
+def _get_input_matrix():
+    # 입력 행렬을 복사하지 않고 numpy 뷰로 참조 (양자화 모델은 지원하지 않음)
+    global _input_matrix
+    if _input_matrix is None and not ft_model.f.isQuant():
+        _input_matrix = np.array(ft_model.f.getInputMatrix(), copy=False)
+    return _input_matrix
+
+def _rows(word):
+    rows = _word_rows.get(word)
+    if rows is None:
+        if len(_word_rows) >= MAX_CACHED_WORDS:
+            _word_rows.clear()
+        _, rows = ft_model.get_subwords(word)
+        rows = _word_rows[word] = np.asarray(rows, dtype=np.int64)
+    return rows
+
+def _segment_sum(values, lengths):
+    # lengths 길이의 연속 구간별 합계, 빈 구간은 0
+    sums = np.zeros((len(lengths),) + values.shape[1:], dtype=np.float32)
+    nonempty = lengths > 0
+    if nonempty.any():
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        sums[nonempty] = np.add.reduceat(values, starts[nonempty], axis=0)
+    return sums
+
+def sentence_vectors(texts):
+    """
+    fastText get_sentence_vector 와 같은 방식으로 여러 문장을 한 번에 벡터화합니다.
+    - 단어 벡터 = 단어와 subword n-gram 행의 평균
+    - 문장 벡터 = L2 정규화한 단어 벡터(0 벡터 제외)의 평균
+    :return: (len(texts), dim) 배열
+    """
+    matrix = _get_input_matrix()
+    if matrix is None:
+        return np.array([ft_model.get_sentence_vector(' '.join(TOKEN_PATTERN.findall(text))) for text in texts], dtype=np.float32)
+
+    dim = matrix.shape[1]
+    vocabulary = {}
+    token_ids = []
+    token_counts = np.empty(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        tokens = TOKEN_PATTERN.findall(text)
+        token_counts[i] = len(tokens)
+        token_ids.extend(vocabulary.setdefault(token, len(vocabulary)) for token in tokens)
+
+    if not vocabulary:
+        return np.zeros((len(texts), dim), dtype=np.float32)
+
+    # 고유 단어별 행 번호를 모아 한 번에 gather 후 구간 합
+    word_rows = [_rows(word) for word in vocabulary]
+    row_counts = np.array([len(rows) for rows in word_rows], dtype=np.int64)
+    word_vectors = _segment_sum(matrix[np.concatenate(word_rows)], row_counts)
+    word_vectors /= np.maximum(row_counts, 1)[:, None]
+
+    # 단어 벡터 정규화, 0 벡터는 문장 평균에서 제외
+    norms = np.linalg.norm(word_vectors, axis=1)
+    valid = norms > 0
+    word_vectors[valid] /= norms[valid][:, None]
+
+    token_ids = np.asarray(token_ids, dtype=np.int64)
+    sums = _segment_sum(word_vectors[token_ids], token_counts)
+    counts = _segment_sum(valid[token_ids].astype(np.float32), token_counts)
+    return np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], 0).astype(np.float32)
+
+# 여러 문장을 캐시를 거쳐 벡터화
+def get_sentence_vectors(texts):
+    return cached_encode(MODEL_ID, texts, sentence_vectors)
+
+def get_sentence_vector(text):
+    return get_sentence_vectors([text])[0]
+
+def parity_check(texts):
+    """
+    배치 구현과 ft_model.get_sentence_vector 결과의 최대 차이를 반환합니다.
+    """
+    expected = np.array([ft_model.get_sentence_vector(' '.join(TOKEN_PATTERN.findall(text))) for text in texts])
+    return float(np.abs(sentence_vectors(texts) - expected).max())
@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import cv2
+
+# 목표 지연 시간(ms): 왕복 시간 + 서버 추론 시간이 이 값을 넘지 않도록 품질을 조절
+LATENCY_TARGET_MS = float(os.getenv("WS_LATENCY_TARGET_MS", 250))
+
+# 자세 가이드(guide.draw_human_silhouette)의 고정 픽셀 오프셋이 맞춰진 해상도
+# 해상도가 바뀌면 가이드 영역의 의미가 달라지므로 캡처 해상도는 고정하고 더 큰 입력만 축소
+GUIDE_WIDTH = 640
+GUIDE_HEIGHT = 480
+
+# 프레임레이트, JPEG 품질 단계 (인덱스가 낮을수록 가벼움)
+QUALITY_LEVELS = [
+    {"fps": 5, "jpeg_quality": 50},
+    {"fps": 8, "jpeg_quality": 60},
+    {"fps": 10, "jpeg_quality": 70},
+    {"fps": 12, "jpeg_quality": 75},
+    {"fps": 15, "jpeg_quality": 80},
+]
+
+# 지수 이동 평균 가중치
+EWMA_ALPHA = 0.2
+# 단계를 내린 뒤 다음 판단까지 기다리는 프레임 수
+DOWNGRADE_COOLDOWN = 5
+# 여유가 이만큼 연속으로 유지되면 한 단계 올림
+UPGRADE_STREAK = 20
+# 목표 대비 이 비율 이하일 때 여유가 있다고 판단
+UPGRADE_HEADROOM = 0.6
+
+
+def _ewma(previous, value):
+    if previous is None:
+        return value
+    return (1 - EWMA_ALPHA) * previous + EWMA_ALPHA * value
+
+
+def _now_ms():
+    return time.monotonic() * 1000
+
+
+def parse_client_message(data):
+    """
+    /ws 로 받은 메시지를 해석합니다.
+    기존 클라이언트는 data URL 문자열만 보내고, 품질 협상을 지원하는 클라이언트는
+    {"image": data URL, "ack": 직전 응답의 ts, "held_ms": 응답 수신 후 전송까지 대기한 시간} 을 보냅니다.
+    :return: (data URL, ack, held_ms)
+    """
+    if data.startswith('{'):
+        message = json.loads(data)
+        return message["image"], message.get("ack"), message.get("held_ms", 0)
+    return data, None, 0
+
+
+class FrameQualityController:
+    """
+    웹소켓 세션별로 왕복 시간과 서버 추론 시간을 측정해
+    클라이언트에 권장 캡처 설정(프레임레이트, JPEG 품질)을 알려주고 계속 조정합니다.
+    """
+
+    def __init__(self, latency_target_ms=LATENCY_TARGET_MS):
+        self.latency_target_ms = latency_target_ms
+        self.level = len(QUALITY_LEVELS) // 2
+        self.rtt_ms = None
+        self.server_ms = None
+        self.cooldown = 0
+        self.headroom_streak = 0
+        self.settings_sent = False
+
+    @property
+    def settings(self):
+        return {"width": GUIDE_WIDTH, "height": GUIDE_HEIGHT, **QUALITY_LEVELS[self.level]}
+
+    def record_ack(self, ack, held_ms=0):
+        # 클라이언트가 돌려준 ts 로 네트워크 왕복 시간을 계산 (클라이언트 대기 시간 제외)
+        if ack is None:
+            return
+        rtt = _now_ms() - float(ack) - float(held_ms or 0)
+        if rtt >= 0:
+            self.rtt_ms = _ewma(self.rtt_ms, rtt)
+
+    def record_server_time(self, elapsed_ms):
+        self.server_ms = _ewma(self.server_ms, elapsed_ms)
+        self._adjust()
+
+    def latency_ms(self):
+        return (self.rtt_ms or 0) + (self.server_ms or 0)
+
+    def _adjust(self):
+        if self.cooldown > 0:
+            self.cooldown -= 1
+            return
+
+        latency = self.latency_ms()
+        # 서버가 프레임 간격 안에 처리하지 못하면 큐가 쌓이므로 함께 고려
+        frame_budget_ms = 1000 / self.settings["fps"]
+        overloaded = latency > self.latency_target_ms or (self.server_ms or 0) > frame_budget_ms
+
+        if overloaded:
+            self.headroom_streak = 0
+            if self.level > 0:
+                self.level -= 1
+                self.settings_sent = False
+                self.cooldown = DOWNGRADE_COOLDOWN
+            return
+
+        if latency < self.latency_target_ms * UPGRADE_HEADROOM:
+            self.headroom_streak += 1
+            if self.headroom_streak >= UPGRADE_STREAK and self.level < len(QUALITY_LEVELS) - 1:
+                self.level += 1
+                self.settings_sent = False
+                self.headroom_streak = 0
+        else:
+            self.headroom_streak = 0
+
+    def fit_frame(self, frame):
+        # 가이드 해상도보다 큰 입력만 서버에서 축소하여 처리 (품질 단계와 관계없이 같은 해상도)
+        h, w = frame.shape[:2]
+        scale = min(GUIDE_WIDTH / w, GUIDE_HEIGHT / h)
+        if scale < 1:
+            frame = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        return frame
+
+    def encode_params(self):
+        return [cv2.IMWRITE_JPEG_QUALITY, self.settings["jpeg_quality"]]
+
+    def annotate(self, response):
+        """
+        응답에 ts 를 붙이고, 설정이 바뀐 경우 권장 설정을 함께 보냅니다.
+        """
+        response["ts"] = _now_ms()
+        if not self.settings_sent:
+            response["settings"] = dict(self.settings)
+            response["latency_ms"] = round(self.latency_ms(), 1)
+            self.settings_sent = True
+        return response
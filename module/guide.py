@@ -61,4 +61,5 @@ def process_frame(frame):
             is_within_area(right_shoulder, top_left, top_right, height, head_center, head_radius)):
             success_flag = True
 
-    return frame, success_flag
\ No newline at end of file
+    # 세션 포즈 통계 누적을 위해 랜드마크도 함께 반환
+    return frame, success_flag, results.pose_landmarks
\ No newline at end of file
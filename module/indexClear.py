@@ -1,6 +1,9 @@
-from elasticsearch import Elasticsearch, NotFoundError
+from elasticsearch import Elasticsearch
 import os
 from dotenv import load_dotenv
+from module.index_manager import reset_index
+# 매핑 등록을 위해 인덱스를 정의한 모듈을 불러옴
+from module.pdfSave import INDEX_NAME, PROFILE_INDEX
 
 # .env 파일 로드
 load_dotenv()
@@ -8,19 +11,13 @@ load_dotenv()
 # .env 파일에서 Elasticsearch 호스트 정보 가져오기
 ELASTICSEARCH_HOST = os.getenv("elastic")
 es = Elasticsearch([ELASTICSEARCH_HOST])
-INDEX_NAME = "pdf_array"
+# 키-값 문서 인덱스와 이력서 프로필 인덱스
+INDEX_NAMES = [INDEX_NAME, PROFILE_INDEX]
 
 def delete_docs():
-    try:
-        # 인덱스 존재 여부 확인
-        if not es.indices.exists(index=INDEX_NAME):
-            print(f"인덱스 '{INDEX_NAME}'가 존재하지 않습니다.")
-            return
-
-        # 인덱스가 존재하면 문서 삭제 진행
-        result = es.delete_by_query(index=INDEX_NAME, body={"query": {"match_all": {}}})
-        print(f"{result['deleted']} 개의 문서가 삭제되었습니다.")
-    except NotFoundError:
-        print(f"인덱스 '{INDEX_NAME}'를 찾을 수 없습니다.")
-    except Exception as e:
-        print(f"문서 삭제 중 오류 발생: {e}")
+    # 문서를 하나씩 지우지 않고 빈 새 인덱스로 별칭을 옮김, 이전 인덱스는 백그라운드에서 삭제
+    for index_name in INDEX_NAMES:
+        try:
+            reset_index(es, index_name)
+        except Exception as e:
+            print(f"인덱스 초기화 중 오류 발생 ({index_name}): {e}")
@@ -0,0 +1,199 @@
+import os
+import time
+import threading
+from elasticsearch import NotFoundError
+from module.vector_projection import clear_projection_cache
+
+# 별칭 기반 인덱스 관리
+# - 논리 인덱스 이름(예: pdf_array)은 읽기 별칭, {이름}_write 는 쓰기 별칭
+# - 실제 인덱스는 {이름}_v{매핑 버전}_{생성 시각} 으로 만들고, 초기화/재색인/매핑 변경 시
+#   새 인덱스를 만든 뒤 두 별칭을 한 번에 옮기고 이전 인덱스는 백그라운드에서 삭제
+
+# 재색인 작업 상태 확인 간격과 최대 대기 시간 (초)
+REINDEX_POLL_SECONDS = float(os.getenv("REINDEX_POLL_SECONDS", 2))
+REINDEX_TIMEOUT_SECONDS = float(os.getenv("REINDEX_TIMEOUT_SECONDS", 1800))
+
+# 이름 -> {"version": 매핑 버전, "body": 인덱스 생성 body, "reindex_query": 재색인 대상 쿼리}
+_definitions = {}
+# 이번 프로세스에서 이미 확인한 인덱스 (인덱싱마다 확인 요청을 보내지 않도록)
+_ensured = set()
+_lock = threading.Lock()
+
+
+def register_index(name, version, body, reindex_query=None):
+    """
+    논리 인덱스의 매핑을 등록합니다. 매핑을 바꿀 때는 version 을 올리면 ensure_index 가 새 인덱스로 옮깁니다.
+    :param body: settings/mappings 를 담은 인덱스 생성 body
+    :param reindex_query: 재색인할 때 새 인덱스로 옮길 문서만 고르는 쿼리 (기본값: 전체 문서)
+    """
+    _definitions[name] = {"version": version, "body": body, "reindex_query": reindex_query}
+
+def write_alias(name):
+    return f"{name}_write"
+
+def _new_index_body(name, projection=None):
+    definition = _definitions[name]
+    body = dict(definition["body"])
+    mappings = dict(body.get("mappings", {}))
+    mappings["_meta"] = {**mappings.get("_meta", {}), "mapping_version": definition["version"]}
+    if projection:
+        # 차원 축소된 인덱스는 투영 정보와 축소된 vector 차원을 유지 (index/similarity 설정은 등록된 매핑 그대로)
+        properties = dict(mappings.get("properties", {}))
+        properties["vector"] = {**properties["vector"], "dims": projection["dims"]}
+        mappings["properties"] = properties
+        mappings["_meta"]["projection"] = projection
+    body["mappings"] = mappings
+    return body
+
+def _create_physical_index(es, name, projection=None):
+    index = f"{name}_v{_definitions[name]['version']}_{int(time.time() * 1000)}"
+    es.indices.create(index=index, body=_new_index_body(name, projection))
+    return index
+
+def _aliased_indices(es, name):
+    # 읽기 별칭이 가리키는 실제 인덱스 목록 (별칭이 없으면 빈 리스트)
+    try:
+        return list(es.indices.get_alias(name=name).keys())
+    except NotFoundError:
+        return []
+
+def _index_meta(es, index):
+    return es.indices.get_mapping(index=index)[index]["mappings"].get("_meta", {})
+
+def _mapping_version(es, index):
+    return _index_meta(es, index).get("mapping_version", 0)
+
+def _current_projection(es, indices):
+    # 현재 인덱스에 설정된 차원 축소 정보 (없으면 None)
+    return _index_meta(es, indices[0]).get("projection") if indices else None
+
+def _delete_later(es, indices):
+    def delete():
+        for index in indices:
+            try:
+                es.indices.delete(index=index, ignore_unavailable=True)
+                print(f"이전 인덱스 삭제 완료: {index}")
+            except Exception as e:
+                print(f"이전 인덱스 삭제 실패 ({index}): {e}")
+
+    if indices:
+        threading.Thread(target=delete, daemon=True).start()
+
+def _swap(es, name, new_index, old_indices, legacy_index=None):
+    """
+    읽기/쓰기 별칭을 new_index 로 원자적으로 옮기고 이전 인덱스는 백그라운드에서 삭제합니다.
+    :param legacy_index: 별칭 이름과 같은 이름의 기존 실제 인덱스 (같은 요청에서 삭제해야 별칭을 만들 수 있음)
+    """
+    actions = [
+        {"add": {"index": new_index, "alias": name}},
+        {"add": {"index": new_index, "alias": write_alias(name), "is_write_index": True}}
+    ]
+    for index in old_indices:
+        actions.append({"remove": {"index": index, "alias": name}})
+        actions.append({"remove": {"index": index, "alias": write_alias(name)}})
+    if legacy_index:
+        actions.append({"remove_index": {"index": legacy_index}})
+
+    es.indices.update_aliases(body={"actions": actions})
+    # 별칭이 가리키는 인덱스가 바뀌었으므로 인덱스별 투영 정보를 다시 조회하게 함
+    clear_projection_cache()
+    print(f"별칭 '{name}' -> {new_index}")
+    _delete_later(es, old_indices)
+
+def _legacy_index(es, name):
+    # 별칭 도입 전에 만들어진, 논리 이름 그대로의 실제 인덱스
+    if es.indices.exists_alias(name=name):
+        return None
+    return name if es.indices.exists(index=name) else None
+
+def ensure_index(es, name):
+    """
+    논리 인덱스를 사용할 수 있게 준비합니다.
+    - 별칭이 없으면 새 인덱스를 만들고 별칭을 연결
+    - 별칭 없이 같은 이름의 기존 인덱스가 있으면 새 인덱스로 재색인 후 교체
+    - 현재 인덱스의 매핑 버전이 등록된 버전보다 낮으면 재색인 후 교체
+    """
+    if name in _ensured:
+        return
+    with _lock:
+        if name in _ensured:
+            return
+
+        legacy = _legacy_index(es, name)
+        current = _aliased_indices(es, name)
+        if legacy:
+            reindex(es, name, source=legacy)
+        elif not current:
+            _swap(es, name, _create_physical_index(es, name), [])
+        elif _mapping_version(es, current[0]) < _definitions[name]["version"]:
+            reindex(es, name)
+        _ensured.add(name)
+
+def reset_index(es, name):
+    """
+    빈 새 인덱스로 별칭을 옮깁니다. delete_by_query 와 달리 문서 수와 관계없이 바로 끝납니다.
+    """
+    legacy = _legacy_index(es, name)
+    current = _aliased_indices(es, name)
+    new_index = _create_physical_index(es, name, _current_projection(es, current))
+    _swap(es, name, new_index, current, legacy_index=legacy)
+    _ensured.add(name)
+
+def _wait_for_task(es, task_id, timeout=REINDEX_TIMEOUT_SECONDS):
+    """
+    ES 작업이 끝날 때까지 상태를 조회합니다. 시간 안에 끝나지 않으면 작업을 취소합니다.
+    :return: 작업 결과(response)
+    """
+    deadline = time.time() + timeout
+    while True:
+        task = es.tasks.get(task_id=task_id)
+        if task.get("completed"):
+            if task.get("error"):
+                raise RuntimeError(f"작업 실패 ({task_id}): {task['error']}")
+            return task.get("response", {})
+        if time.time() > deadline:
+            es.tasks.cancel(task_id=task_id)
+            raise TimeoutError(f"작업이 {timeout}초 안에 끝나지 않아 취소했습니다: {task_id}")
+        time.sleep(REINDEX_POLL_SECONDS)
+
+def rebuild_index(es, name, fill, projection=None, legacy_index=None):
+    """
+    등록된 매핑으로 새 인덱스를 만들어 fill 로 문서를 채운 뒤 별칭을 옮깁니다. fill 이 실패하면 새 인덱스를 지웁니다.
+    :param fill: fill(new_index), 새 실제 인덱스에 문서를 씀 (예외를 던지면 교체하지 않음)
+    :param projection: 차원 축소 정보 (_meta.projection 에 기록되고 vector 차원이 projection["dims"] 가 됨)
+    :param legacy_index: 함께 삭제할, 별칭 이름과 같은 이름의 기존 실제 인덱스
+    """
+    old_indices = _aliased_indices(es, name)
+    new_index = _create_physical_index(es, name, projection)
+    try:
+        fill(new_index)
+    except Exception:
+        es.indices.delete(index=new_index, ignore_unavailable=True)
+        raise
+    _swap(es, name, new_index, old_indices, legacy_index=legacy_index)
+
+def reindex(es, name, source=None):
+    """
+    등록된 매핑으로 새 인덱스를 만들어 현재 문서(reindex_query 가 있으면 해당 문서만)를 복사한 뒤 별칭을 옮깁니다.
+    재색인은 ES 작업으로 실행하고 완료될 때까지 상태를 조회하며, 실패하면 새 인덱스를 지웁니다.
+    :param source: 복사할 인덱스 (기본값: 현재 읽기 별칭)
+    """
+    reindex_source = {"index": source or name}
+    if _definitions[name]["reindex_query"]:
+        reindex_source["query"] = _definitions[name]["reindex_query"]
+
+    def copy(new_index):
+        task = es.reindex(
+            body={"source": reindex_source, "dest": {"index": new_index}},
+            wait_for_completion=False,
+            refresh=True
+        )
+        result = _wait_for_task(es, task["task"])
+        if result.get("failures"):
+            # 일부 문서가 빠진 인덱스로 교체하지 않음
+            raise RuntimeError(f"재색인 실패 ({name}): {result['failures'][:3]}")
+        print(f"재색인 완료 ({name}): {result.get('created', 0)}개 문서")
+
+    # 차원 축소된 인덱스는 같은 투영을 유지해야 벡터를 그대로 복사할 수 있음
+    projection = _current_projection(es, _aliased_indices(es, name))
+    rebuild_index(es, name, copy, projection, legacy_index=source if source == name else None)
@@ -7,6 +7,7 @@ from langchain_community.document_loaders import PyPDFLoader
 from elasticsearch import Elasticsearch
 from datetime import datetime
 from dotenv import load_dotenv
+from module.pdfSave import PROFILE_INDEX, create_profile_index
 
 # .env 파일 로드
 load_dotenv()
@@ -17,105 +18,66 @@ if ELASTICSEARCH_HOST is None:
     raise ValueError("elastic 환경 변수가 설정되지 않았습니다.")
 
 es = Elasticsearch([ELASTICSEARCH_HOST])
-INDEX_NAME="pdf_array"
 api_key = os.getenv("API_KEY")
 if api_key is None:
     raise ValueError("API_KEY가 없습니다.")
 
-work_list=[]
-
-def is_match(value, number):
-    if value == "신입":
-        return number < 12
-    elif value == "1~3년":
-        return number >=12 and number < 36
-    elif value == "3~5년":
-        return number >= 36 and number < 60
-    elif value == "5~7년":
-        return number >= 60 and number < 84
-    elif value == "7~10년":
-        return number >= 84 and number < 120
-    elif value == "10년이상":
-        return number >= 120
-    return False
-
-# 딕셔너리와 체크박스 값이 일치하는지 확인하는 함수
-def match_numbers(selected_values, work_list):
-    matched_sources = []
-    
-    for entry in work_list:
-        career = entry["career"]
-        career_parsed=parse_time(career)
-        print("source", entry["source"])
-        print("career", entry["career"])
-        print("parsed",career_parsed)
-        # 선택된 값들 중 하나라도 해당 career와 일치하는지 확인
-        for value in selected_values:
-            if is_match(value, career_parsed):
-                matched_sources.append({
-                    "source" : entry["source"],
-                    "career" : career_parsed
-                })
-                
-                
-                break  # 일치하면 더 이상 체크할 필요 없으므로 중단
-    
-    return matched_sources
-    
-
+# 체크박스 값별 경력 개월 수 범위 [from, to)
+CAREER_RANGES = {
+    "신입": {"to": 12},
+    "1~3년": {"from": 12, "to": 36},
+    "3~5년": {"from": 36, "to": 60},
+    "5~7년": {"from": 60, "to": 84},
+    "7~10년": {"from": 84, "to": 120},
+    "10년이상": {"from": 120},
+}
+MAX_RESULTS = 5000
+
+def career_range_query(value):
+    career_range = CAREER_RANGES[value]
+    return {"range": {"career_months": {
+        **({"gte": career_range["from"]} if "from" in career_range else {}),
+        **({"lt": career_range["to"]} if "to" in career_range else {})
+    }}}
 
 def get_work_experience(career_options):
-
-
-    query = {
-    "size":5000,
-    "query": {
-        "match": {
-        "key": "work_experience"
+    """
+    선택한 경력 구간에 해당하는 이력서와 구간별 이력서 수를 한 번의 검색으로 가져옵니다.
+    :param career_options: 체크박스 값 리스트 (예: ["신입", "3~5년"])
+    :return: {"matches": [{"source", "career"}], "buckets": {구간: 이력서 수}}
+    """
+    selected = [value for value in career_options if value in CAREER_RANGES]
+    # 업로드 전에도 인덱스가 있도록 만들고, 프로필이 없는 기존 이력서는 채움
+    create_profile_index()
+
+    response = es.search(
+        index=PROFILE_INDEX,
+        body={
+            "size": MAX_RESULTS,
+            "_source": ["source", "career_months"],
+            # 구간별 개수는 전체 이력서 기준, 목록만 선택한 구간으로 거름
+            "aggs": {
+                "career": {
+                    "range": {
+                        "field": "career_months",
+                        "keyed": True,
+                        "ranges": [{"key": value, **career_range} for value, career_range in CAREER_RANGES.items()]
+                    }
+                }
+            },
+            "post_filter": {
+                "bool": {
+                    "should": [career_range_query(value) for value in selected],
+                    "minimum_should_match": 1
+                }
+            } if selected else {"match_none": {}}
         }
-    }
-    }
-
-
-    # 검색 실행
-    response = es.search(index=INDEX_NAME, body=query)
-
-    # 결과 출력
-    for hit in response['hits']['hits']:
-        source = hit['_source'].get('source', 'No source field')
-        key = hit['_source'].get('key', 'No source field')
-        value = hit['_source'].get('value', 'No source field')
-        # print(f"source: {source}")
-        # print(f"key: {key}")
-        # print(f"value: {value}")
-        # print('---')
-        work_list.append({
-            "source" : source,
-            "career" : value
-        })
-        
-    matched_ids = match_numbers(career_options, work_list)
-    return matched_ids
-
-def parse_time(time_str):
-        total_months = 0
-        parts = time_str.split()
-        try:
-            for part in parts:
-                if '년' in part:
-                    years = int(part.replace('년', ''))
-                    total_months += years * 12
-                elif '개월' in part:
-                    months = int(part.replace('개월', ''))
-                    total_months += months
-        except Exception:
-            total_months=0
-        
-        return total_months
-        
-    
-
-       
-       
-    
-
+    )
+
+    matches = [
+        {"source": hit['_source']['source'], "career": hit['_source']['career_months']}
+        for hit in response['hits']['hits']
+        if 'career_months' in hit['_source']
+    ]
+    buckets = {key: bucket['doc_count'] for key, bucket in response['aggregations']['career']['buckets'].items()}
+    return {"matches": matches, "buckets": buckets}
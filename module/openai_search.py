@@ -3,6 +3,10 @@ from openai import OpenAI
 import json
 import re
 import os
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from langchain_community.document_loaders import PyPDFLoader
 from elasticsearch import Elasticsearch
 from dotenv import load_dotenv
@@ -21,30 +25,79 @@ api_key = os.getenv("API_KEY")
 if api_key is None:
     raise ValueError("API_KEY가 없습니다.")
 
+# LLM 으로 점수를 매기기 전에 ES 관련도 순으로 남길 이력서 수
+PREFILTER_SIZE = int(os.getenv("SEARCH_PREFILTER_SIZE", 20))
+# 동시에 보낼 LLM 요청 수
+LLM_CONCURRENCY = int(os.getenv("SEARCH_LLM_CONCURRENCY", 4))
+# (키워드, 이력서 내용 해시) -> LLM 결과 캐시 크기
+SCORE_CACHE_SIZE = int(os.getenv("SEARCH_SCORE_CACHE_SIZE", 1024))
+MIN_SCORE = 50
+
+_score_cache = OrderedDict()
+_score_cache_lock = threading.Lock()
+
+def prefilter_query(keyword):
+    # "," 로 구분된 키워드 중 하나라도 매칭되는 이력서를 관련도 순으로
+    terms = [term.strip() for term in keyword.split(",") if term.strip()]
+    return {
+        "bool": {
+            "should": [{"match": {"content": {"query": term, "fuzziness": "AUTO"}}} for term in terms],
+            "minimum_should_match": 1
+        }
+    }
+
+def get_candidates(keyword, size=PREFILTER_SIZE):
+    """
+    키워드와 관련도가 높은 상위 size 개 이력서를 가져옵니다. 텍스트로 매칭되는 이력서가 없으면 앞에서부터 size 개를 사용합니다.
+    """
+    body = {"size": size, "_source": ["source", "content"]}
+    hits = es.search(index=INDEX_NAME, body={**body, "query": prefilter_query(keyword)})['hits']['hits']
+    if not hits:
+        hits = es.search(index=INDEX_NAME, body={**body, "query": {"match_all": {}}})['hits']['hits']
+    return hits
+
+def cached_openai_search(keyword, source, content):
+    cache_key = (keyword, hashlib.sha1(content.encode('utf-8')).hexdigest())
+    with _score_cache_lock:
+        answer_json = _score_cache.get(cache_key)
+        if answer_json is not None:
+            _score_cache.move_to_end(cache_key)
+
+    if answer_json is None:
+        answer_json = openai_search(keyword, source, content)
+        with _score_cache_lock:
+            _score_cache[cache_key] = answer_json
+            if len(_score_cache) > SCORE_CACHE_SIZE:
+                _score_cache.popitem(last=False)
+
+    # 내용이 같은 다른 이력서일 수 있으므로 source 는 현재 값으로
+    return {**answer_json, "source": source}
+
+def score_hit(keyword, hit):
+    content = hit['_source'].get('content', 'No content field')
+    source = hit['_source'].get('source', 'No source field')
+    try:
+        return cached_openai_search(keyword, source, content)
+    except Exception as e:
+        print(f"이력서 점수 계산 실패 ({source}): {e}")
+        return None
+
 def search_all(keyword):
-    filtered_list=[]
-    doc={
-    "query": {
-        "match_all": {}
-  }
-}
-    response = es.search(index=INDEX_NAME, body=doc)
-    for hit in response['hits']['hits']:
-        content = hit['_source'].get('content', 'No content field')
-        source = hit['_source'].get('source', 'No source field')
-        answer_json=openai_search(keyword,source,content)
-        if(answer_json["score"]>50):
-                filtered_list.append(answer_json)
-    
+    """
+    ES 로 후보 이력서를 좁힌 뒤 LLM 으로 키워드 관련도를 동시에 채점합니다.
+    :return: 점수가 MIN_SCORE 를 넘는 결과, 점수 내림차순
+    """
+    hits = get_candidates(keyword)
+    with ThreadPoolExecutor(max_workers=LLM_CONCURRENCY) as executor:
+        answers = list(executor.map(lambda hit: score_hit(keyword, hit), hits))
+
+    filtered_list = [answer for answer in answers if answer is not None and answer["score"] > MIN_SCORE]
     sorted_data = sorted(filtered_list, key=lambda x: x['score'], reverse=True)
-    # print(sorted_data)
     return sorted_data
 
-def openai_search(keyword,key,value):
-        client = OpenAI(
-            api_key = api_key
-        )
+client = OpenAI(api_key=api_key)
 
+def openai_search(keyword,key,value):
         array_content =  f"""Find a part of your resume that is similar to "{keyword}"
     Score from 0 to 100 based on "{keyword}".  
     Following policies must be strongly reflected:
@@ -1,16 +1,30 @@
 import os
+import threading
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
 from typing import Union, List
 from elasticsearch import Elasticsearch, helpers
 from sentence_transformers import SentenceTransformer
 from langchain_text_splitters import CharacterTextSplitter
+from module.embedding_cache import cached_encode
+from module.doc_ids import doc_id
+from module.bulk_writer import write_bulk
+from module.index_manager import register_index, ensure_index, write_alias
 
 # Elasticsearch 설정
 ELASTICSEARCH_HOST = os.getenv("elastic")
 INDEX_NAME = 'pdf_array'
+# 이력서 한 건의 추출 결과 전체를 담는 문서 (_id = source 해시)
+PROFILE_INDEX = 'resume_profile'
+PROFILE_KEYS = ["name", "date_of_birth", "technical_skills", "work_experience", "number_of_projects", "project_description", "summary_keywords"]
 es = Elasticsearch([ELASTICSEARCH_HOST])
 
 # Sentence Transformer 모델 로드
 model = SentenceTransformer('all-MiniLM-L6-v2')  # 경량화된 모델 사용
+MODEL_ID = 'minilm:all-MiniLM-L6-v2'
+
+# 한 번에 임베딩할 문장 수 (벌크 요청 단위와 동일)
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 64))
 
 # 새로운 전처리 함수
 def preprocess_data(data: Union[str, List[str]]) -> List[str]:
@@ -61,79 +75,212 @@ def get_vector(text):
     """
     Sentence Transformer를 이용해 텍스트를 벡터화하는 함수
     """
-    return model.encode(text)
+    return get_vectors([text])[0]
+
+# 여러 텍스트를 한 번의 배치 호출로 벡터화 (캐시에 없는 텍스트만 인코딩)
+def get_vectors(texts, batch_size=EMBED_BATCH_SIZE):
+    return cached_encode(MODEL_ID, texts, lambda missing: model.encode(missing, batch_size=batch_size))
+
+# 인덱스 매핑 (매핑을 바꾸면 버전을 올림)
+register_index(INDEX_NAME, 1, {
+    "mappings": {
+        "properties": {
+            "key": {"type": "keyword"},
+            "value": {"type": "text"},
+            "vector": {
+                "type": "dense_vector",
+                "dims": 384  # MiniLM 모델의 벡터 차원
+            },
+            "source": {"type": "keyword"}
+        }
+    }
+})
+
+register_index(PROFILE_INDEX, 1, {
+    "mappings": {
+        "properties": {
+            "source": {"type": "keyword"},
+            **{key: {"type": "text"} for key in PROFILE_KEYS},
+            # work_experience("N년 M개월")를 개월 수로 변환한 값 (경력 필터용)
+            "career_months": {"type": "integer"}
+        }
+    }
+})
 
-# Elasticsearch에 인덱스 생성
+# Elasticsearch에 인덱스 생성 (별칭이 없을 때만)
 def create_index():
-    es.indices.create(
-        index=INDEX_NAME,
-        body={
-            "mappings": {
-                "properties": {
-                    "key": {"type": "keyword"},
-                    "value": {"type": "text"},
-                    "vector": {
-                        "type": "dense_vector",
-                        "dims": 384  # MiniLM 모델의 벡터 차원
-                    },
-                    "source": {"type": "keyword"}
-                }
-            }
-        },
-        ignore=400
-    )
+    ensure_index(es, INDEX_NAME)
 
-# Elasticsearch에 문서 추가
-def get_next_id(index_name):
-    try:
-        result = es.search(index=index_name, body={"aggs": {"max_id": {"max": {"field": "id"}}}})
-        return int(result['aggregations']['max_id']['value']) + 1
-    except:
-        return 1
+# 이번 프로세스에서 기존 이력서의 프로필을 채웠는지 여부
+_profiles_backfilled = False
+_backfill_lock = threading.Lock()
 
-# Elasticsearch에 문서 추가
-def index_documents(index_name, resumes, source):
-    actions = []
-    next_id = get_next_id(index_name)
-    
+def create_profile_index():
+    global _profiles_backfilled
+    ensure_index(es, PROFILE_INDEX)
+    if _profiles_backfilled:
+        return
+    with _backfill_lock:
+        if not _profiles_backfilled:
+            backfill_profiles()
+            _profiles_backfilled = True
+
+# source 로 항상 같은 프로필 문서 _id 를 만듦
+def profile_id(source):
+    return doc_id(source)
+
+def build_profile(resumes, source):
+    """
+    전처리된 "key: value" 리스트를 이력서 한 건의 프로필로 묶습니다. 같은 키가 여러 번 나오면 처음 값을 사용합니다.
+    """
+    profile = {"source": source}
     for resume in resumes:
         key, value = resume.split(':', 1)
-        key = key.strip()
-        value = value.strip()
-        vector = get_vector(value).tolist()  # 값만 벡터화
-        
-        doc = {
-            '_index': index_name,
-            '_id': next_id,
-            '_source': {
-                'id': next_id,
-                'key': key,
-                'value': value,
-                'vector': vector,
-                'source': source
-            }
+        profile.setdefault(key.strip(), value.strip())
+    if "work_experience" in profile:
+        profile["career_months"] = parse_time(profile["work_experience"])
+    return profile
+
+# "3년 6개월" 형태의 경력을 개월 수로 변환, 해석할 수 없으면 0
+def parse_time(time_str):
+    total_months = 0
+    parts = time_str.split()
+    try:
+        for part in parts:
+            if '년' in part:
+                years = int(part.replace('년', ''))
+                total_months += years * 12
+            elif '개월' in part:
+                months = int(part.replace('개월', ''))
+                total_months += months
+    except Exception:
+        total_months = 0
+
+    return total_months
+
+# 응답에는 기본 추출 항목만 포함
+def profile_response(profile):
+    return {"source": profile["source"], **{key: profile[key] for key in PROFILE_KEYS if key in profile}}
+
+def profile_actions(profiles):
+    for profile in profiles:
+        yield {
+            '_index': write_alias(PROFILE_INDEX),
+            '_id': profile_id(profile['source']),
+            '_source': profile
         }
-        actions.append(doc)
-        print(f"준비된 문서 {next_id}: {key} - {value}")
-        next_id += 1
-    
-    # 벌크 인덱싱 수행
-    success, failed = helpers.bulk(es, actions, stats_only=True)
-    print(f"인덱싱 완료: {success}개 성공, {failed}개 실패")
+
+def backfill_profiles():
+    """
+    프로필 문서가 없거나 career_months 가 없는 기존 이력서의 프로필을 pdf_array 키-값 문서로 만듭니다.
+    (프로필 인덱스 도입 전에 저장된 이력서도 경력 필터에 포함되도록)
+    :return: 새로 저장한 프로필 수
+    """
+    if not es.indices.exists(index=INDEX_NAME):
+        return 0
+
+    existing = {
+        hit['_id']
+        for hit in helpers.scan(es, index=PROFILE_INDEX, query={"query": {"exists": {"field": "career_months"}}, "_source": False})
+    }
+    resumes = {}
+    for hit in helpers.scan(es, index=INDEX_NAME, query={"query": {"match_all": {}}, "_source": ["key", "value", "source"]}):
+        source = hit['_source']
+        if not all(field in source for field in ("key", "value", "source")) or profile_id(source['source']) in existing:
+            continue
+        resumes.setdefault(source['source'], []).append(f"{source['key']}: {source['value']}")
+
+    profiles = [build_profile(lines, source) for source, lines in resumes.items()]
+    if profiles:
+        write_bulk(es, profile_actions(profiles), label=PROFILE_INDEX)
+        es.indices.refresh(index=PROFILE_INDEX)
+    print(f"기존 이력서 프로필 생성: {len(profiles)}개")
+    return len(profiles)
+
+# Elasticsearch에 문서 추가
+def index_documents(index_name, resumes, source):
+    index_batch(index_name, [(resumes, source)])
+
+# 임베딩 배치와 벌크 요청을 겹쳐서 문서 생성
+def generate_actions(index_name, items, batch_size):
+    chunks = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+    if not chunks:
+        return
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        # 현재 청크의 벌크 요청이 전송되는 동안 다음 청크를 미리 임베딩
+        future = executor.submit(get_vectors, [value for _, _, value, _ in chunks[0]], batch_size)
+        for chunk_index, chunk in enumerate(chunks):
+            vectors = future.result()
+            if chunk_index + 1 < len(chunks):
+                future = executor.submit(get_vectors, [value for _, _, value, _ in chunks[chunk_index + 1]], batch_size)
+
+            for (_id, key, value, source), vector in zip(chunk, vectors):
+                yield {
+                    '_index': index_name,
+                    '_id': _id,
+                    '_source': {
+                        'key': key,
+                        'value': value,
+                        'vector': vector.tolist(),
+                        'source': source
+                    }
+                }
+
+# 여러 이력서의 키-값을 모아서 한 번에 인덱싱
+def index_batch(index_name, resume_batch, batch_size=EMBED_BATCH_SIZE):
+    """
+    :param resume_batch: (전처리된 "key: value" 리스트, source) 튜플 리스트
+    :param batch_size: 한 번에 임베딩하고 벌크 전송할 문서 수
+    :return: 저장한 이력서 프로필 리스트 (refresh 완료 후 반환)
+    """
+    items = []
+    profiles = []
+    for resumes, source in resume_batch:
+        for position, resume in enumerate(resumes):
+            key, value = resume.split(':', 1)
+            key = key.strip()
+            # 같은 이력서를 다시 저장하면 같은 문서를 덮어씀
+            items.append((doc_id(source, key, position), key, value.strip(), source))
+        profiles.append(build_profile(resumes, source))
+
+    # 키-값 문서와 이력서별 프로필 문서를 같은 벌크 스트림으로 전송
+    actions = chain(
+        generate_actions(index_name, items, batch_size),
+        profile_actions(profiles)
+    )
+    write_bulk(es, actions, label=index_name, chunk_size=batch_size)
+
+    # 벌크 청크마다 기다리지 않고, 마지막에 쓴 인덱스만 한 번 refresh
+    es.indices.refresh(index=[index_name, PROFILE_INDEX])
+    return profiles
 
 def main(results, source):
-    preprocessed_contents = preprocess_data(results)
-    
-    print("전처리된 결과:")
-    for item in preprocessed_contents:
-        print(item)
-    print("전처리된 항목 수:", len(preprocessed_contents))
+    return main_batch([(results, source)])[0]
+
+# /pdf 업로드 전체를 한 번에 저장
+def main_batch(result_batch):
+    """
+    :param result_batch: (LLM 추출 결과, source) 튜플 리스트
+    :return: 이력서별 {"source", 추출 항목...} 리스트 (result_batch 순서)
+    """
+    resume_batch = []
+    for results, source in result_batch:
+        preprocessed_contents = preprocess_data(results)
+
+        print(f"전처리된 결과 ({source}):")
+        for item in preprocessed_contents:
+            print(item)
+        print("전처리된 항목 수:", len(preprocessed_contents))
+        resume_batch.append((preprocessed_contents, source))
 
     # 인덱스 생성
     create_index()
+    create_profile_index()
 
     # 문서 인덱싱
-    index_documents(INDEX_NAME, preprocessed_contents, source)
+    profiles = index_batch(write_alias(INDEX_NAME), resume_batch)
+    return [profile_response(profile) for profile in profiles]
 
 if __name__ == '__main__':
     # 예시 데이터와 출처 (실제 데이터를 넣어주셔야 합니다)
@@ -1,15 +1,15 @@
 import os
 from dotenv import load_dotenv
 from elasticsearch import Elasticsearch
-import fasttext
-import fasttext.util
 import numpy as np
+from module.fasttext_embedding import get_sentence_vectors
+from module.doc_ids import doc_id
+from module.bulk_writer import write_bulk
+from module.index_manager import register_index, ensure_index, write_alias
 
 from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import CharacterTextSplitter
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 import fitz
-fasttext.util.download_model('ko', if_exists='ignore')
-ft_model = fasttext.load_model('cc.ko.300.bin')
 
 # .env 파일 로드
 load_dotenv()
@@ -20,17 +20,60 @@ ELASTICSEARCH_HOST = os.getenv('elastic')
 INDEX_NAME = "fasttext_search"
 # Elasticsearch 연결
 es = Elasticsearch([ELASTICSEARCH_HOST])
-def add_resumes(source,resume_name):
-       
+# 청크 크기 설정 (문장/섹션 단위)
+CHUNK_SIZE = int(os.getenv("RESUME_CHUNK_SIZE", 200))
+CHUNK_OVERLAP = int(os.getenv("RESUME_CHUNK_OVERLAP", 20))
+
+# HNSW 그래프 설정
+HNSW_M = int(os.getenv("FASTTEXT_HNSW_M", 16))
+HNSW_EF_CONSTRUCTION = int(os.getenv("FASTTEXT_HNSW_EF_CONSTRUCTION", 100))
+
+# 인덱스 매핑 (매핑을 바꾸면 버전을 올림)
+# 재색인 시 청크/문서(level 이 있는) 문서만 옮기고, 이전 방식의 단어 단위 문서는 버림
+register_index(INDEX_NAME, 2, {
+    "settings": {
+        "analysis": {
+            "tokenizer": {
+                "nori_mixed_tokenizer": {"type": "nori_tokenizer", "decompound_mode": "mixed"}
+            },
+            "analyzer": {
+                "nori_mixed": {"type": "custom", "tokenizer": "nori_mixed_tokenizer"}
+            }
+        }
+    },
+    "mappings": {
+        "properties": {
+            "source": {"type": "keyword"},
+            "level": {"type": "keyword"},
+            "chunk_index": {"type": "integer"},
+            "content": {
+                "type": "text",
+                "fields": {
+                    "keyword": {"type": "keyword", "ignore_above": 256},
+                    "nori_mixed": {"type": "text", "analyzer": "nori_mixed"}
+                }
+            },
+            "vector": {
+                "type": "dense_vector",
+                "dims": 300,  # fastText 벡터 차원
+                "index": True,
+                "similarity": "cosine",
+                "index_options": {"type": "hnsw", "m": HNSW_M, "ef_construction": HNSW_EF_CONSTRUCTION}
+            }
+        }
+    }
+}, reindex_query={"exists": {"field": "level"}})
 
-            text=read_pdf(source)
-            # print(text)
-            text = text.replace('\n', ' ').strip()
-            
-            # sents=split_text_into_words(text)
-            sents=text.split()
-            # print(sents)
-            add_doccument(sents,resume_name)
+# Elasticsearch에 인덱스 생성 (vector 는 kNN 검색을 위해 HNSW 로 색인)
+def create_index():
+    ensure_index(es, INDEX_NAME)
+
+def add_resumes(source,resume_name):
+    create_index()
+    text=read_pdf(source)
+    # 단어 단위 대신 문장/섹션 단위 청크로 분할
+    chunks=split_text(text)
+    add_doccument(chunks,resume_name)
 
 def read_pdf(file_path):
     text = ""
@@ -41,38 +84,51 @@ def read_pdf(file_path):
 
 
 def split_text(text):
-    text_splitter = CharacterTextSplitter(
-        separator = '.',
-        chunk_size = 10,
-        chunk_overlap = 3,
+    # 빈 줄(섹션) -> 줄 -> 문장 -> 공백 순서로 나누어 CHUNK_SIZE 이하로 병합
+    text_splitter = RecursiveCharacterTextSplitter(
+        separators = ["\n\n", "\n", ". ", " "],
+        chunk_size = CHUNK_SIZE,
+        chunk_overlap = CHUNK_OVERLAP,
         length_function = len,
     )
-    return text_splitter.split_text(text)
-def is_non_zero_vector(vector):
-    return np.any(vector != 0)
+    return [' '.join(chunk.split()) for chunk in text_splitter.split_text(text) if chunk.strip()]
 
 
 
 def add_doccument(text,title):
-    # 문서 내용의 평균 벡터 계산
-    next_id = get_next_id(INDEX_NAME)
-    
-    for i, content in enumerate(text, start=next_id):
-        
-        content = content.replace('\n', '').replace(',', '').strip()
-        vectors = ft_model.get_sentence_vector(content)
-        if is_non_zero_vector(vectors):
-
-    
-            doc = {
+    """
+    이력서 청크마다 문서 하나, 이력서 전체에 대한 문서 하나를 벌크로 인덱싱합니다.
+    :param text: 청크 리스트
+    :param title: 이력서 source
+    """
+    docs = []
+
+    # 청크 벡터(청크 안 단어 벡터의 평균)와 문서 벡터(이력서 전체 단어 벡터의 평균)를 한 번에 계산
+    full_text = ' '.join(text)
+    vectors = get_sentence_vectors(list(text) + [full_text])
+    non_zero = np.any(vectors != 0, axis=1)
+
+    for chunk_index, content in enumerate(text):
+        if non_zero[chunk_index]:
+            docs.append((doc_id(title, "chunk", chunk_index), {
                 "source": title,
                 "content": content,
-                "vector": vectors.tolist()
-            }
-            es.index(index=INDEX_NAME, body=doc, id=i)
+                "level": "chunk",
+                "chunk_index": chunk_index,
+                "vector": vectors[chunk_index].tolist()
+            }))
         else : 
             print(f"Skipping document {content}: Zero vector")
 
-def get_next_id(index_name):
-    response = es.count(index=index_name)
-    return response['count']
\ No newline at end of file
+    if non_zero[-1]:
+        docs.append((doc_id(title, "document"), {
+            "source": title,
+            "content": full_text,
+            "level": "document",
+            "vector": vectors[-1].tolist()
+        }))
+
+    # source 와 청크 위치로 _id 를 정하므로 같은 이력서를 다시 올려도 중복되지 않음
+    actions = [{"_index": write_alias(INDEX_NAME), "_id": _id, "_source": doc} for _id, doc in docs]
+    # 검색에 보이는 상태가 될 때까지 기다린 뒤 반환
+    write_bulk(es, actions, label=f"{INDEX_NAME} ({title})", refresh="wait_for")
@@ -0,0 +1,62 @@
+import os
+import time
+from module.check_distance import analyze_landmarks
+
+# /ws 세션이 끝난 뒤 /process_audio 업로드를 기다리는 최대 시간(초)
+SESSION_TTL = int(os.getenv("POSE_SESSION_TTL", 1800))
+
+# session_id -> 실시간 포즈 통계
+_sessions = {}
+
+def _purge_expired(now):
+    expired = [session_id for session_id, stats in _sessions.items() if now - stats["updated_at"] > SESSION_TTL]
+    for session_id in expired:
+        del _sessions[session_id]
+
+def update_session(session_id, pose_landmarks):
+    """
+    /ws 로 들어온 프레임의 포즈 결과를 세션 통계에 누적합니다.
+    :param session_id: 클라이언트가 전달한 면접 세션 id
+    :param pose_landmarks: MediaPipe 포즈 랜드마크 (감지되지 않았으면 None)
+    """
+    if not session_id:
+        return
+
+    now = time.time()
+    stats = _sessions.get(session_id)
+    if stats is None:
+        _purge_expired(now)
+        stats = _sessions[session_id] = {
+            "frame_count": 0,
+            "landmark_frames": 0,
+            "feedback_set": set(),
+            "updated_at": now
+        }
+
+    stats["frame_count"] += 1
+    stats["updated_at"] = now
+
+    # 랜드마크가 감지된 프레임만 분석 (convert_webm_to_mp3 와 동일한 기준)
+    if pose_landmarks:
+        stats["landmark_frames"] += 1
+        stats["feedback_set"].update(analyze_landmarks(pose_landmarks))
+
+def get_session_feedback(session_id):
+    """
+    세션에 누적된 포즈 피드백을 읽습니다. 세션은 clear_session 을 호출할 때까지 유지됩니다.
+    :return: 중복이 제거된 피드백 리스트, 사용할 수 있는 통계가 없으면 None
+    """
+    if not session_id:
+        return None
+
+    _purge_expired(time.time())
+    stats = _sessions.get(session_id)
+    if stats is None or stats["frame_count"] == 0:
+        return None
+
+    return list(stats["feedback_set"])
+
+def clear_session(session_id):
+    # 업로드 처리가 끝난 세션의 통계를 정리
+    if session_id:
+        _sessions.pop(session_id, None)
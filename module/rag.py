@@ -1,10 +1,10 @@
 import requests
 import os
 from bs4 import BeautifulSoup
-from transformers import BertTokenizer, BertModel
-import torch
 from elasticsearch import Elasticsearch
 from langchain_text_splitters import CharacterTextSplitter
+from module.rag_ingest import index_chunks
+from module.index_manager import register_index, ensure_index, write_alias
 
 # 설정
 ELASTICSEARCH_HOST = os.getenv("elastic")
@@ -40,49 +40,30 @@ def split_text(text):
     )
     return text_splitter.split_text(text)
 
-# 텍스트를 벡터로 변환
-tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
-model = BertModel.from_pretrained('bert-base-uncased')
-
-def get_vector(text):
-    inputs = tokenizer(text, return_tensors='pt')
-    with torch.no_grad():
-        outputs = model(**inputs)
-    return outputs.last_hidden_state[0][0].numpy()
+# 인덱스 매핑 (매핑을 바꾸면 버전을 올림)
+register_index(INDEX_NAME, 2, {
+    "mappings": {
+        "properties": {
+            "question": {"type": "text"},
+            "vector": {
+                "type": "dense_vector",
+                "dims": 768,  # BERT 모델을 사용할 경우
+                # 필터 kNN 검색(rag_retrieval)을 위해 HNSW 로 색인
+                "index": True,
+                "similarity": "cosine"
+            }
+        }
+    }
+})
 
 # Elasticsearch에 인덱스 생성
 def create_index():
-    es.indices.create(
-        index=INDEX_NAME,
-        body={
-            "mappings": {
-                "properties": {
-                    "question": {"type": "text"},
-                    "vector": {
-                        "type": "dense_vector",
-                        "dims": 768  # BERT 모델을 사용할 경우
-                    }
-                }
-            }
-        },
-        ignore=400  # 이미 존재하는 인덱스일 경우 오류 무시
-    )
+    ensure_index(es, INDEX_NAME)
 
-# 기존 문서의 수를 파악하여 새로운 ID를 생성
-def get_next_id(index_name):
-    response = es.count(index=index_name)
-    return response['count']
-
-# Elasticsearch에 문서 추가
+# Elasticsearch에 문서 추가 (배치 임베딩 + 벌크 인덱싱)
 def index_documents(index_name, questions):
-    next_id = get_next_id(index_name)
-    for i, question in enumerate(questions, start=next_id):
-        vector = get_vector(question).tolist()
-        doc = {
-            'question': question,
-            'vector': vector
-        }
-        es.index(index=index_name, id=i, body=doc)
+    docs = [{'question': question} for question in questions]
+    index_chunks(es, write_alias(index_name), docs, text_field='question')
 
 # 인덱스에서 문서 출력
 def print_text_from_index():
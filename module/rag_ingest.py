@@ -0,0 +1,28 @@
+from module.bert_embedding import get_vectors, BATCH_SIZE
+from module.vector_projection import project_for_index
+from module.doc_ids import doc_id
+from module.bulk_writer import write_bulk
+
+# 청크를 배치 단위로 임베딩하면서 벌크 문서로 변환
+def generate_actions(es, index_name, docs, text_field, batch_size):
+    for start in range(0, len(docs), batch_size):
+        batch = docs[start:start + batch_size]
+        # 인덱스에 차원 축소가 설정되어 있으면 같은 투영을 적용
+        vectors = project_for_index(es, index_name, get_vectors([doc[text_field] for doc in batch], batch_size))
+
+        for doc, vector in zip(batch, vectors):
+            yield {
+                '_index': index_name,
+                # 같은 청크는 항상 같은 _id (다시 수집해도 중복 저장되지 않음)
+                '_id': doc_id(doc[text_field]),
+                '_source': {**doc, 'vector': vector.tolist()}
+            }
+
+def index_chunks(es, index_name, docs, text_field='question', batch_size=BATCH_SIZE):
+    """
+    RAG 말뭉치 청크를 배치 임베딩하여 공용 벌크 writer 로 인덱싱합니다.
+    :param docs: 인덱싱할 문서(dict) 리스트, text_field 값이 임베딩 대상
+    :return: (성공 수, 실패 수)
+    """
+    actions = generate_actions(es, index_name, docs, text_field, batch_size)
+    return write_bulk(es, actions, label=index_name, chunk_size=batch_size)
@@ -0,0 +1,219 @@
+import os
+import sys
+import json
+import time
+import threading
+import numpy as np
+from elasticsearch import helpers
+
+# RAG 말뭉치 스냅샷 설정
+SNAPSHOT_DIR = os.getenv("RAG_SNAPSHOT_DIR", "cache/rag_snapshots")
+REFRESH_SECONDS = int(os.getenv("RAG_SNAPSHOT_REFRESH_SECONDS", 3600))  # 이보다 오래된 스냅샷은 백그라운드에서 다시 만듦
+# IVF 분할 (0 이면 전체 스캔)
+IVF_LISTS = int(os.getenv("RAG_IVF_LISTS", 0))
+IVF_PROBES = int(os.getenv("RAG_IVF_PROBES", 4))  # 질의마다 탐색할 분할 수
+IVF_ITERATIONS = 10
+
+# 스냅샷에 보관할 _source 필드 (vector 제외)
+SNAPSHOT_FIELDS = ["question", "original", "date_field"]
+NO_DATE = -1
+
+
+def _date_number(value):
+    # "2024-09-24" -> 20240924, 없거나 해석할 수 없으면 NO_DATE
+    try:
+        return int(str(value)[:10].replace('-', ''))
+    except (TypeError, ValueError):
+        return NO_DATE
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+def train_ivf(vectors, lists, iterations=IVF_ITERATIONS, seed=42):
+    """
+    정규화된 벡터로 구면 k-means 를 학습합니다.
+    :return: (lists, dim) 중심 벡터, 벡터별 분할 번호
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for i in range(lists):
+            members = vectors[assignments == i]
+            if len(members):
+                centroids[i] = members.sum(axis=0)
+        centroids = _normalize(centroids)
+    return centroids, np.argmax(vectors @ centroids.T, axis=1).astype(np.int32)
+
+
+class LocalVectorIndex:
+    """
+    RAG 말뭉치의 (정규화된) 벡터 행렬과 메타데이터로 날짜 필터 + 코사인 top-k 를 프로세스 안에서 계산합니다.
+    - 벡터는 디스크의 .npy 를 memory-map 으로 읽음
+    - centroids 가 있으면 가까운 IVF_PROBES 개 분할만 탐색
+    """
+
+    def __init__(self, ids, sources, vectors, dates, centroids=None, assignments=None, created_at=None):
+        self.ids = ids
+        self.sources = sources
+        self.vectors = vectors
+        self.dates = dates
+        self.centroids = centroids
+        self.assignments = assignments
+        self.created_at = created_at or time.time()
+
+    @classmethod
+    def from_documents(cls, ids, sources, vectors, ivf_lists=IVF_LISTS):
+        vectors = _normalize(vectors)
+        dates = np.array([_date_number(source.get("date_field")) for source in sources], dtype=np.int32)
+        centroids, assignments = None, None
+        if ivf_lists and len(vectors) > ivf_lists:
+            centroids, assignments = train_ivf(vectors, ivf_lists)
+        return cls(ids, sources, vectors, dates, centroids, assignments)
+
+    def _candidate_rows(self, query, probes):
+        if self.centroids is None:
+            return None
+        nearest = np.argsort(-(self.centroids @ query))[:probes]
+        return np.flatnonzero(np.isin(self.assignments, nearest))
+
+    def search(self, query_vector, k, source_fields, date_from=None, date_to=None, probes=IVF_PROBES):
+        """
+        :param date_from, date_to: "YYYY-MM-DD" (포함), 지정하면 date_field 가 범위 안인 문서만
+        :return: Elasticsearch hits 와 같은 형태의 리스트 (_score 는 ES cosine 과 같은 (1 + cos) / 2)
+        """
+        query = _normalize(query_vector)
+        rows = self._candidate_rows(query, probes)
+
+        mask = None
+        if date_from or date_to:
+            dates = self.dates if rows is None else self.dates[rows]
+            mask = dates != NO_DATE
+            if date_from:
+                mask &= dates >= _date_number(date_from)
+            if date_to:
+                mask &= dates <= _date_number(date_to)
+            rows = np.flatnonzero(mask) if rows is None else rows[mask]
+
+        if rows is None:
+            scores = self.vectors @ query
+            rows = np.arange(len(scores))
+        else:
+            scores = self.vectors[rows] @ query
+
+        if len(scores) == 0:
+            return []
+        top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            {
+                "_id": self.ids[rows[i]],
+                "_score": float((1 + scores[i]) / 2),
+                "_source": {field: self.sources[rows[i]][field] for field in source_fields if field in self.sources[rows[i]]}
+            }
+            for i in top
+        ]
+
+    def save(self, name, directory=SNAPSHOT_DIR):
+        # 임시 파일에 쓴 뒤 교체하여 읽는 중인 스냅샷이 깨지지 않도록 함
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, name)
+        np.save(f"{base}.vectors.tmp.npy", self.vectors)
+        np.savez(f"{base}.meta.tmp.npz", dates=self.dates,
+                 centroids=self.centroids if self.centroids is not None else np.empty((0, 0), dtype=np.float32),
+                 assignments=self.assignments if self.assignments is not None else np.empty(0, dtype=np.int32))
+        with open(f"{base}.docs.tmp.json", "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "sources": self.sources, "created_at": self.created_at}, f, ensure_ascii=False)
+
+        for suffix in ["vectors.npy", "meta.npz", "docs.json"]:
+            os.replace(f"{base}.{suffix.replace('.', '.tmp.', 1)}", f"{base}.{suffix}")
+
+    @classmethod
+    def load(cls, name, directory=SNAPSHOT_DIR):
+        base = os.path.join(directory, name)
+        with open(f"{base}.docs.json", encoding="utf-8") as f:
+            docs = json.load(f)
+        meta = np.load(f"{base}.meta.npz")
+        centroids = meta["centroids"] if meta["centroids"].size else None
+        assignments = meta["assignments"] if meta["assignments"].size else None
+        vectors = np.load(f"{base}.vectors.npy", mmap_mode="r")
+        return cls(docs["ids"], docs["sources"], vectors, meta["dates"], centroids, assignments, docs["created_at"])
+
+
+def build_snapshot(es, index_name, directory=SNAPSHOT_DIR):
+    """
+    Elasticsearch 인덱스의 벡터와 메타데이터를 읽어 스냅샷 파일로 저장합니다.
+    """
+    ids, sources, vectors = [], [], []
+    for hit in helpers.scan(es, index=index_name, query={"query": {"match_all": {}}, "_source": SNAPSHOT_FIELDS + ["vector"]}):
+        source = hit["_source"]
+        vector = source.pop("vector", None)
+        if vector is None:
+            continue
+        ids.append(hit["_id"])
+        sources.append(source)
+        vectors.append(vector)
+
+    if not vectors:
+        raise ValueError(f"'{index_name}' 인덱스에 벡터가 있는 문서가 없습니다.")
+
+    index = LocalVectorIndex.from_documents(ids, sources, vectors)
+    index.save(index_name, directory)
+    print(f"RAG 스냅샷 저장 완료: {index_name} ({len(ids)}개 문서, IVF {'사용' if index.centroids is not None else '미사용'})")
+    return index
+
+
+# index_name -> LocalVectorIndex
+_indices = {}
+_refreshing = set()
+_lock = threading.Lock()
+
+def _refresh_in_background(es, index_name):
+    def refresh():
+        try:
+            build_snapshot(es, index_name)
+            _indices[index_name] = LocalVectorIndex.load(index_name)
+        except Exception as e:
+            print(f"RAG 스냅샷 갱신 실패 ({index_name}): {e}")
+        finally:
+            with _lock:
+                _refreshing.discard(index_name)
+
+    with _lock:
+        if index_name in _refreshing:
+            return
+        _refreshing.add(index_name)
+    threading.Thread(target=refresh, daemon=True).start()
+
+def get_local_index(es, index_name):
+    """
+    스냅샷을 불러옵니다. 파일이 없으면 바로 만들고, REFRESH_SECONDS 보다 오래됐으면 기존 스냅샷으로 응답하면서 백그라운드에서 갱신합니다.
+    """
+    index = _indices.get(index_name)
+    if index is None:
+        with _lock:
+            index = _indices.get(index_name)
+            if index is None:
+                try:
+                    index = LocalVectorIndex.load(index_name)
+                except FileNotFoundError:
+                    build_snapshot(es, index_name)
+                    index = LocalVectorIndex.load(index_name)
+                _indices[index_name] = index
+
+    if time.time() - index.created_at > REFRESH_SECONDS:
+        _refresh_in_background(es, index_name)
+    return index
+
+# python -m module.rag_local_index new_technology rag_behavioral
+if __name__ == '__main__':
+    from elasticsearch import Elasticsearch
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    es = Elasticsearch([os.getenv("elastic")])
+    for name in sys.argv[1:]:
+        build_snapshot(es, name)
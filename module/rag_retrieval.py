@@ -0,0 +1,167 @@
+import os
+import random
+from datetime import datetime, timedelta
+from elasticsearch import Elasticsearch
+from dotenv import load_dotenv
+from module.bert_embedding import get_vector
+from module.vector_projection import project_query
+from module.search_diagnostics import should_diagnose, log_diagnostics
+from module.rag_local_index import get_local_index
+from module.index_manager import register_index, ensure_index
+
+load_dotenv()
+
+ELASTICSEARCH_HOST = os.getenv("elastic")
+es = Elasticsearch([ELASTICSEARCH_HOST])
+
+# 샤드별 HNSW 탐색 후보 수 (k 보다 작으면 k 를 사용)
+KNN_NUM_CANDIDATES = int(os.getenv("RAG_KNN_NUM_CANDIDATES", 100))
+# behavioral 질문은 최근 기사만 사용
+RECENT_DAYS = 30
+
+# 검색 백엔드
+# - elasticsearch: ES kNN + 텍스트 매칭
+# - local: ES 에서 주기적으로 받아 둔 스냅샷으로 프로세스 안에서 벡터 검색 (텍스트 매칭 없음)
+BACKEND = os.getenv("RAG_BACKEND", "elasticsearch")
+
+# search_rag 가 조회하는 RAG 말뭉치 인덱스 (매핑을 바꾸면 버전을 올림)
+# 별칭이 없는 기존 인덱스는 처음 검색할 때 HNSW 로 색인된 새 인덱스로 재색인됨
+RAG_INDICES = ["new_technology", "rag_behavioral", "test_rag_behavioral"]
+for name in RAG_INDICES:
+    register_index(name, 2, {
+        "mappings": {
+            "properties": {
+                "question": {"type": "text"},
+                "vector": {
+                    "type": "dense_vector",
+                    "dims": 768,
+                    # 필터 kNN 검색을 위해 HNSW 로 색인
+                    "index": True,
+                    "similarity": "cosine"
+                }
+            }
+        }
+    })
+
+# 현재 날짜로 부터 days 일 전 까지의 날짜 함수
+def get_date_range(days: int):
+    today = datetime.now()
+    start_date = today - timedelta(days=days)
+    return today.strftime("%Y-%m-%d"), start_date.strftime("%Y-%m-%d")
+
+# behavioral 이면 (시작일, 오늘), 아니면 None
+def date_range_for(type: str):
+    if type != "behavioral":
+        return None
+    today_str, start_str = get_date_range(RECENT_DAYS)
+    return start_str, today_str
+
+def build_filters(type: str):
+    date_range = date_range_for(type)
+    if date_range is None:
+        return []
+
+    start_str, today_str = date_range
+    return [{
+        "range": {
+            "date_field": {
+                "gte": start_str,
+                "lte": today_str
+            }
+        }
+    }]
+
+def random_rescore(window_size, seed):
+    # 상위 window_size 개 후보의 점수를 시드 고정 난수로 바꿔 무작위 표본을 반환하게 함
+    return {
+        "window_size": window_size,
+        "query": {
+            "rescore_query": {"function_score": {"random_score": {"seed": seed, "field": "_seq_no"}}},
+            "query_weight": 0,
+            "rescore_query_weight": 1
+        }
+    }
+
+def search_elasticsearch(index_name, query_text, query_vector, type, k, source_fields, explain, profile, sample_size=None, seed=None):
+    filters = build_filters(type)
+
+    body = {
+        "knn": {
+            "field": "vector",
+            "query_vector": query_vector.tolist(),
+            "k": k,
+            "num_candidates": max(KNN_NUM_CANDIDATES, k),
+            "filter": filters
+        },
+        "query": {
+            "bool": {
+                "should": [
+                    {
+                        "match": {
+                            "question": {
+                                "query": query_text,
+                                "fuzziness": "AUTO"
+                            }
+                        }
+                    }
+                ],
+                "filter": filters
+            }
+        },
+        "size": k,
+        "_source": source_fields,
+        "explain": explain,
+        "profile": profile
+    }
+    if sample_size:
+        body["rescore"] = random_rescore(k, seed)
+        body["size"] = min(sample_size, k)
+
+    response = es.search(index=index_name, body=body)
+    if explain or profile:
+        log_diagnostics(index_name, query_text, response)
+    return response['hits']['hits']
+
+def search_local(index_name, query_text, query_vector, type, k, source_fields, explain, profile, sample_size=None, seed=None):
+    # explain/profile 은 ES 전용이라 무시
+    date_from, date_to = date_range_for(type) or (None, None)
+    hits = get_local_index(es, index_name).search(query_vector, k, source_fields, date_from, date_to)
+    if sample_size:
+        hits = random.Random(seed).sample(hits, min(sample_size, len(hits)))
+    return hits
+
+BACKENDS = {
+    "elasticsearch": search_elasticsearch,
+    "local": search_local,
+}
+
+def search_rag(index_name: str, query_text: str, type: str, k: int, source_fields, explain=None, profile=None, backend=None,
+               sample_size=None, seed=None):
+    """
+    RAG 인덱스에서 날짜 필터를 먼저 적용한 벡터 검색으로 상위 k 개 문서를 가져옵니다.
+    :param source_fields: 반환할 _source 필드 목록
+    :param explain, profile: None 이면 진단 모드(헤더/샘플링)일 때만 켜짐
+    :param backend: 검색 백엔드 이름 (기본값: RAG_BACKEND)
+    :param sample_size: 지정하면 상위 k 개 후보 중 sample_size 개를 무작위로 반환
+    :param seed: 표본 추출 시드 (기본값: 매 호출마다 새로 뽑음)
+    :return: Elasticsearch hits 리스트 (local 백엔드도 같은 형태)
+    """
+    backend = backend or BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"지원하지 않는 RAG 검색 백엔드입니다: {backend} ({', '.join(BACKENDS)})")
+
+    if explain is None or profile is None:
+        diagnose = should_diagnose()
+        explain = diagnose if explain is None else explain
+        profile = diagnose if profile is None else profile
+
+    if sample_size and seed is None:
+        seed = random.randrange(2 ** 31)
+
+    # knn 이 동작하도록 등록된 매핑의 인덱스인지 확인 (프로세스마다 한 번)
+    if index_name in RAG_INDICES:
+        ensure_index(es, index_name)
+
+    # 인덱스에 차원 축소가 설정되어 있으면 같은 투영을 적용 (스냅샷 벡터도 인덱스에 저장된 공간)
+    query_vector = project_query(es, index_name, get_vector(query_text))
+    return BACKENDS[backend](index_name, query_text, query_vector, type, k, source_fields, explain, profile, sample_size, seed)
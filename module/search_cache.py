@@ -0,0 +1,88 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from module.embedding_cache import normalize_text
+
+# 검색 결과 캐시가 사용할 최대 메모리 (직렬화한 결과 크기 기준)
+SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+
+
+class SearchResultCache:
+    """
+    질의 결과 LRU 캐시. 인덱스 세대(generation)가 바뀌면 이전 세대의 결과를 모두 버립니다.
+    - /pdf 업로드, /reset_index 가 bump_generation 을 호출
+    - 세대 번호는 프로세스 안에서만 공유됨
+    """
+
+    def __init__(self, max_bytes=SEARCH_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.generation = 0
+        self._entries = OrderedDict()  # key -> (size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _drop(self, key):
+        size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key, value, generation):
+        """
+        :param generation: 검색을 시작할 때의 세대 (검색 중에 세대가 바뀌었으면 저장하지 않음)
+        """
+        size = len(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+        with self._lock:
+            if generation != self.generation or size > self.max_bytes:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def bump_generation(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._bytes = 0
+            return self.generation
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "generation": self.generation, "items": len(self._entries), "bytes": self._bytes}
+
+
+_cache = SearchResultCache()
+
+def cached_search(query, params, search_fn):
+    """
+    (정규화된 질의, 검색 파라미터) 로 결과를 캐시합니다.
+    :param params: 결과에 영향을 주는 나머지 값 (예: size, offset), 해시 가능해야 함
+    :param search_fn: 캐시에 없을 때 호출, 인자 없이 결과를 반환
+    """
+    key = (normalize_text(query), params)
+    result = _cache.get(key)
+    if result is None:
+        generation = _cache.generation
+        result = search_fn()
+        _cache.put(key, result, generation)
+    return result
+
+def bump_generation():
+    return _cache.bump_generation()
+
+def get_stats():
+    return _cache.stats()
@@ -0,0 +1,100 @@
+import os
+import json
+import random
+import logging
+from contextvars import ContextVar
+
+# 요청 헤더로 진단 모드를 켤 수 있음 (예: X-Search-Diagnostics: 1)
+DIAGNOSTICS_HEADER = "X-Search-Diagnostics"
+# 헤더가 없어도 이 비율만큼의 검색은 진단 정보를 수집 (0 이면 끔)
+DIAGNOSTICS_SAMPLE_RATE = float(os.getenv("SEARCH_DIAGNOSTICS_SAMPLE_RATE", 0))
+DIAGNOSTICS_LOG = os.getenv("SEARCH_DIAGNOSTICS_LOG", "logs/search_diagnostics.log")
+# explanation 트리는 이 깊이까지만 요약
+MAX_EXPLANATION_DEPTH = 3
+
+# 현재 요청에서 진단 모드를 요청했는지 여부 (미들웨어에서 설정)
+_requested = ContextVar("search_diagnostics", default=False)
+
+_logger = None
+
+
+def request_diagnostics(header_value):
+    """
+    헤더 값을 해석해 현재 요청의 진단 모드를 설정합니다.
+    :return: reset_diagnostics 에 넘길 토큰
+    """
+    enabled = str(header_value).strip().lower() in ("1", "true", "yes", "on") if header_value else False
+    return _requested.set(enabled)
+
+def reset_diagnostics(token):
+    _requested.reset(token)
+
+def should_diagnose():
+    # 헤더로 요청했거나 샘플링에 걸린 경우에만 explain/profile 을 요청
+    if _requested.get():
+        return True
+    return DIAGNOSTICS_SAMPLE_RATE > 0 and random.random() < DIAGNOSTICS_SAMPLE_RATE
+
+
+def get_logger():
+    global _logger
+    if _logger is None:
+        os.makedirs(os.path.dirname(DIAGNOSTICS_LOG) or ".", exist_ok=True)
+        _logger = logging.getLogger("search_diagnostics")
+        _logger.setLevel(logging.INFO)
+        _logger.propagate = False
+        handler = logging.FileHandler(DIAGNOSTICS_LOG, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        _logger.addHandler(handler)
+    return _logger
+
+def summarize_explanation(explanation, depth=0):
+    """
+    점수 설명 트리를 상위 MAX_EXPLANATION_DEPTH 단계까지 "점수 설명" 목록으로 요약합니다.
+    """
+    lines = [f"{'  ' * depth}{explanation.get('value', 0):.3f} {explanation.get('description', '')[:120]}"]
+    if depth + 1 < MAX_EXPLANATION_DEPTH:
+        for detail in explanation.get('details', []):
+            lines.extend(summarize_explanation(detail, depth + 1))
+    return lines
+
+def summarize_profile(profile):
+    """
+    샤드별 쿼리 종류와 소요 시간(ms)만 남깁니다.
+    """
+    def timings(queries):
+        return [{"type": query.get('type'), "time_ms": query.get('time_in_nanos', 0) / 1e6} for query in queries]
+
+    shards = []
+    for shard in profile.get('shards', []):
+        queries, knn = [], []
+        for search in shard.get('searches', []):
+            queries.extend(timings(search.get('query', [])))
+        # kNN 은 dfs 단계에서 따로 프로파일됨
+        for knn_search in shard.get('dfs', {}).get('knn', []):
+            knn.extend(timings(knn_search.get('query', [])))
+        shards.append({"id": shard.get('id'), "query": queries, "knn": knn})
+    return shards
+
+def log_diagnostics(index_name, query_text, response):
+    """
+    검색 응답의 explanation 과 profile 을 요약해 진단 로그에 기록합니다.
+    """
+    hits = response['hits']['hits']
+    record = {
+        "index": index_name,
+        "query": query_text[:200],
+        "took_ms": response.get('took'),
+        "hits": [
+            {
+                "_id": hit['_id'],
+                "_score": hit['_score'],
+                "explanation": summarize_explanation(hit['_explanation']) if '_explanation' in hit else None
+            }
+            for hit in hits
+        ]
+    }
+    if 'profile' in response:
+        record["profile"] = summarize_profile(response['profile'])
+
+    get_logger().info(json.dumps(record, ensure_ascii=False))
@@ -1,21 +1,20 @@
 from elasticsearch import Elasticsearch
-import fasttext
-import fasttext.util
 import numpy as np
+from module.fasttext_embedding import get_sentence_vector
+from module.search_cache import cached_search
+from module.pdfSave_vector import create_index
 from nltk.tokenize import word_tokenize, sent_tokenize
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import CharacterTextSplitter
 import fitz
 import os
+import json
+import base64
 from dotenv import load_dotenv
 
 # .env 파일 로드
 load_dotenv()
 
-# FastText 모델 로드
-fasttext.util.download_model('ko', if_exists='ignore')
-ft_model = fasttext.load_model('cc.ko.300.bin')
-
 # .env 파일에서 Elasticsearch 호스트 정보 가져오기
 ELASTICSEARCH_HOST = os.getenv("elastic")
 INDEX_NAME = "fasttext_search"
@@ -23,8 +22,89 @@ INDEX_NAME = "fasttext_search"
 # Elasticsearch 연결
 es = Elasticsearch([ELASTICSEARCH_HOST])
 
-def vector_search(query, top_k=5000):
-    query_vector = ft_model.get_sentence_vector(query)
+# kNN(HNSW) 검색 설정
+KNN_K = int(os.getenv("SEARCH_KNN_K", 100))  # 벡터 검색으로 가져올 청크 수
+KNN_NUM_CANDIDATES = int(os.getenv("SEARCH_KNN_NUM_CANDIDATES", 500))  # 샤드별 HNSW 탐색 후보 수
+# 점수 결합 방식: linear (가중합) 또는 rrf (reciprocal rank fusion)
+FUSION_MODE = os.getenv("SEARCH_FUSION_MODE", "linear")
+VECTOR_WEIGHT = float(os.getenv("SEARCH_VECTOR_WEIGHT", 1.0))
+TEXT_WEIGHT = float(os.getenv("SEARCH_TEXT_WEIGHT", 0.1))
+RRF_RANK_CONSTANT = 60
+# 한 페이지에 반환할 이력서 수
+PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", 20))
+
+# 이력서(source)당 최고 점수 청크 하나만 source, 점수와 함께 반환
+COLLAPSE = {"field": "source"}
+SOURCE_FIELDS = ["source"]
+
+# BM25 / nori 텍스트 매칭
+def text_query(query):
+    return {
+        "bool": {
+            "should": [
+                {"match": {"content": {"query": query, "boost": 1}}},
+                {"term": {"content.keyword": {"value": query, "boost": 2}}},
+                {"match": {"content.nori_mixed": {"query": query, "boost": 1.5}}}
+            ]
+        }
+    }
+
+def knn_query(query_vector, k, num_candidates):
+    return {
+        "field": "vector",
+        "query_vector": query_vector,
+        "k": k,
+        "num_candidates": num_candidates
+    }
+
+def rrf_fuse(result_lists, k, rank_constant=RRF_RANK_CONSTANT):
+    # 이력서별로 각 결과 목록의 순위 역수를 더함
+    scores, hits = {}, {}
+    for results in result_lists:
+        for rank, hit in enumerate(results, start=1):
+            source = hit['_source']['source']
+            scores[source] = scores.get(source, 0) + 1 / (rank_constant + rank)
+            hits.setdefault(source, hit)
+    ranked = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [{**hits[source], '_score': scores[source]} for source in ranked]
+
+def vector_search(query, k=KNN_K, num_candidates=KNN_NUM_CANDIDATES, mode=FUSION_MODE, size=None, offset=0):
+    """
+    HNSW kNN 검색과 BM25/nori 텍스트 검색을 결합합니다. 결과는 이력서당 하나로 collapse 됩니다.
+    - linear: knn 과 query 를 한 요청에 담아 VECTOR_WEIGHT, TEXT_WEIGHT 가중합
+    - rrf: knn, 텍스트 검색을 msearch 로 함께 보내고 순위 기반으로 결합
+    :param size: 반환할 이력서 수 (기본값 k)
+    :param offset: 건너뛸 이력서 수
+    """
+    # 별칭/HNSW 매핑이 준비되지 않은 기존 인덱스면 먼저 옮김 (프로세스마다 한 번)
+    create_index()
+    query_vector = get_sentence_vector(query).tolist()
+    size = size or k
+
+    if mode == "rrf":
+        responses = es.msearch(searches=[
+            {"index": INDEX_NAME},
+            {"knn": knn_query(query_vector, k, num_candidates), "collapse": COLLAPSE, "_source": SOURCE_FIELDS, "size": k},
+            {"index": INDEX_NAME},
+            {"query": text_query(query), "collapse": COLLAPSE, "_source": SOURCE_FIELDS, "size": k}
+        ])
+        fused = rrf_fuse([response['hits']['hits'] for response in responses['responses']], k)
+        return fused[offset:offset + size]
+
+    response = es.search(index=INDEX_NAME, body={
+        "knn": {**knn_query(query_vector, k, num_candidates), "boost": VECTOR_WEIGHT},
+        "query": {"bool": {"should": [text_query(query)], "boost": TEXT_WEIGHT}},
+        "collapse": COLLAPSE,
+        "_source": SOURCE_FIELDS,
+        "from": offset,
+        "size": size
+    })
+    return response['hits']['hits']
+
+# 기존 방식: 전체 문서 cosineSimilarity 스캔 (recall 비교용)
+def exact_search(query, top_k=5000):
+    create_index()
+    query_vector = get_sentence_vector(query)
     script_query = {
          "script_score": {
     "query": {
@@ -75,22 +155,59 @@ def vector_search(query, top_k=5000):
     return response['hits']['hits']
 
 
-def search_result(query):
-    results=vector_search(query)
-    score_list = []
-    for hit in results:
-        # print(hit['_source']['source'])
-        # print(hit['_source']['content'])
-        # print(hit['_score'])
-        new_entry = {
-        "source": hit['_source']['source'],
-        "score": hit['_score']
-        
-    }
-    
-    # 동일한 source가 있는지 확인
-        if not any(entry['source'] == new_entry['source'] for entry in score_list):
-            score_list.append(new_entry)
-    
-    return score_list
+# 페이지 커서 (collapse 는 점수 정렬과 search_after 를 함께 쓸 수 없어 오프셋을 담음)
+def encode_cursor(offset):
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode()
+
+def decode_cursor(cursor):
+    """
+    :return: 건너뛸 이력서 수
+    :raise ValueError: 커서 형식이 잘못되었거나 offset 이 음수인 경우 (offset 이 무한대면 OverflowError)
+    """
+    if not cursor:
+        return 0
+    offset = int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["offset"])
+    if offset < 0:
+        raise ValueError(f"잘못된 커서 offset 입니다: {offset}")
+    return offset
+
+def search_page(query, size=PAGE_SIZE, cursor=None):
+    """
+    이력서당 최고 점수 하나씩, size 개의 결과와 다음 페이지 커서를 반환합니다.
+    :return: {"results": [{"source", "score"}], "next_cursor": 다음 페이지가 없으면 None}
+    """
+    offset = decode_cursor(cursor)
+    # rrf 는 kNN/텍스트 검색 모두 KNN_K 개까지만 결합하므로 그 뒤는 빈 페이지
+    if FUSION_MODE == "rrf" and offset >= KNN_K:
+        return {"results": [], "next_cursor": None}
+
+    def run():
+        hits = vector_search(query, size=size, offset=offset)
+        results = [{"source": hit['_source']['source'], "score": hit['_score']} for hit in hits]
+        next_cursor = encode_cursor(offset + len(results)) if len(results) == size else None
+        return {"results": results, "next_cursor": next_cursor}
+
+    # 같은 질의/페이지는 인덱스가 바뀌기 전까지 캐시된 결과를 사용
+    return cached_search(query, (FUSION_MODE, size, offset), run)
+
+def recall_report(queries, k=10):
+    """
+    전체 스캔(exact_search) 대비 kNN 검색의 이력서 단위 recall@k 를 계산합니다.
+    """
+    def top_sources(hits):
+        sources = []
+        for hit in hits:
+            if hit['_source']['source'] not in sources:
+                sources.append(hit['_source']['source'])
+        return sources[:k]
+
+    recalls = []
+    for query in queries:
+        exact = top_sources(exact_search(query))
+        approx = top_sources(vector_search(query))
+        if exact:
+            recalls.append(len(set(exact) & set(approx)) / len(exact))
 
+    report = {"k": k, "queries": len(recalls), "recall": sum(recalls) / len(recalls) if recalls else 0.0}
+    print(f"[recall@{k}] {report}")
+    return report
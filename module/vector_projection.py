@@ -0,0 +1,196 @@
+import os
+import argparse
+import numpy as np
+from elasticsearch import helpers, NotFoundError
+from module.bulk_writer import write_bulk
+
+# 투영 행렬 저장 위치
+PROJECTION_DIR = os.getenv("VECTOR_PROJECTION_DIR", "models/projections")
+
+# index_name -> 투영 정보 (없으면 None)
+_index_projections = {}
+
+
+def fit_projection(vectors, dims, method="pca", seed=42):
+    """
+    말뭉치 벡터로 차원 축소 투영을 학습합니다.
+    :param method: "pca" (주성분 분석) 또는 "random" (가우시안 랜덤 투영)
+    :return: {"method", "dims", "mean", "components"}
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    full_dims = vectors.shape[1]
+
+    if method == "pca":
+        if len(vectors) < dims:
+            raise ValueError(f"PCA 에는 최소 {dims}개의 벡터가 필요합니다. (현재 {len(vectors)}개)")
+        mean = vectors.mean(axis=0)
+        _, _, vt = np.linalg.svd(vectors - mean, full_matrices=False)
+        components = vt[:dims].T
+    elif method == "random":
+        rng = np.random.default_rng(seed)
+        mean = np.zeros(full_dims, dtype=np.float32)
+        components = rng.standard_normal((full_dims, dims)) / np.sqrt(dims)
+    else:
+        raise ValueError(f"지원하지 않는 투영 방식입니다: {method}")
+
+    return {
+        "method": method,
+        "dims": dims,
+        "mean": mean.astype(np.float32),
+        "components": components.astype(np.float32)
+    }
+
+def apply_projection(projection, vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return (vectors - projection["mean"]) @ projection["components"]
+
+def projection_path(name):
+    return os.path.join(PROJECTION_DIR, f"{name}.npz")
+
+def save_projection(name, projection):
+    os.makedirs(PROJECTION_DIR, exist_ok=True)
+    np.savez(projection_path(name), method=projection["method"], dims=projection["dims"],
+             mean=projection["mean"], components=projection["components"])
+
+def load_projection(name):
+    data = np.load(projection_path(name))
+    return {
+        "method": str(data["method"]),
+        "dims": int(data["dims"]),
+        "mean": data["mean"],
+        "components": data["components"]
+    }
+
+
+def get_index_projection(es, index_name):
+    """
+    인덱스 매핑의 _meta.projection 에 기록된 투영을 불러옵니다. (인덱스별로 한 번만 조회)
+    """
+    if index_name not in _index_projections:
+        projection = None
+        try:
+            mappings = es.indices.get_mapping(index=index_name)
+            # 별칭으로 조회해도 실제 인덱스 하나의 매핑을 사용
+            mapping = next(iter(mappings.values()))["mappings"]
+            meta = mapping.get("_meta", {}).get("projection")
+            if meta:
+                projection = load_projection(meta["name"])
+        except NotFoundError:
+            pass
+        _index_projections[index_name] = projection
+    return _index_projections[index_name]
+
+# 별칭 교체(index_manager) 후 호출
+def clear_projection_cache():
+    _index_projections.clear()
+
+def project_for_index(es, index_name, vectors):
+    """
+    인덱스에 투영이 설정되어 있으면 벡터를 축소하고, 없으면 그대로 반환합니다.
+    인덱싱과 질의 모두 이 함수를 거쳐야 같은 공간에서 비교됩니다.
+    """
+    projection = get_index_projection(es, index_name)
+    if projection is None:
+        return np.asarray(vectors, dtype=np.float32)
+    return apply_projection(projection, vectors)
+
+def project_query(es, index_name, vector):
+    return project_for_index(es, index_name, np.asarray(vector)[None, :])[0]
+
+
+def load_corpus(es, index_name):
+    """
+    인덱스의 모든 문서와 벡터를 읽어옵니다.
+    :return: (문서 _id 리스트, 문서 _source 리스트, (n, dim) 벡터 배열)
+    """
+    ids, docs, vectors = [], [], []
+    for hit in helpers.scan(es, index=index_name, query={"query": {"match_all": {}}}):
+        source = hit["_source"]
+        vectors.append(source.pop("vector"))
+        ids.append(hit["_id"])
+        docs.append(source)
+    return ids, docs, np.asarray(vectors, dtype=np.float32)
+
+def _top_k(vectors, queries, k):
+    normalized = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    normalized_queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    scores = normalized_queries @ normalized.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+def recall_report(vectors, projection, k=10, num_queries=200, seed=42):
+    """
+    말뭉치에서 뽑은 질의로 전체 벡터 대비 축소 벡터의 recall@k 를 계산합니다.
+    """
+    rng = np.random.default_rng(seed)
+    query_indices = rng.choice(len(vectors), size=min(num_queries, len(vectors)), replace=False)
+    queries = vectors[query_indices]
+
+    exact = _top_k(vectors, queries, k)
+    approx = _top_k(apply_projection(projection, vectors), apply_projection(projection, queries), k)
+
+    recalls = [len(set(e) & set(a)) / len(e) for e, a in zip(exact, approx)]
+    report = {
+        "method": projection["method"],
+        "dims": projection["dims"],
+        "full_dims": vectors.shape[1],
+        "k": k,
+        "recall": float(np.mean(recalls)),
+        "vector_size_ratio": projection["dims"] / vectors.shape[1]
+    }
+    print(f"[recall@{k}] {report}")
+    return report
+
+def build_projected_index(es, index_name, dims, method="pca", version=1):
+    """
+    인덱스의 벡터로 투영을 학습하고, 축소된 벡터로 같은 논리 인덱스를 다시 만든 뒤 별칭을 옮깁니다.
+    투영 정보는 새 인덱스 매핑의 _meta 에 기록되어 검색(rag_retrieval)과 인덱싱(rag_ingest)에도 같은 투영이 적용됩니다.
+    :param index_name: index_manager 에 등록된 논리 인덱스 이름 (원본 벡터 인덱스는 교체 후 삭제됨)
+    :param version: 투영 버전 (투영 파일 이름에 사용)
+    """
+    # index_manager 가 이 모듈을 import 하므로 함수 안에서 import
+    from module.index_manager import ensure_index, rebuild_index
+
+    ensure_index(es, index_name)
+    if get_index_projection(es, index_name) is not None:
+        raise ValueError(f"'{index_name}' 인덱스는 이미 차원 축소되어 있습니다.")
+
+    ids, docs, vectors = load_corpus(es, index_name)
+    if len(docs) == 0:
+        raise ValueError(f"'{index_name}' 인덱스에 문서가 없습니다.")
+
+    projection = fit_projection(vectors, dims, method)
+    name = f"{index_name}_{method}{dims}_v{version}"
+    save_projection(name, projection)
+    projected = apply_projection(projection, vectors)
+
+    def fill(new_index):
+        actions = (
+            {"_index": new_index, "_id": doc_id, "_source": {**doc, "vector": vector.tolist()}}
+            for doc_id, doc, vector in zip(ids, docs, projected)
+        )
+        _, failed = write_bulk(es, actions, label=new_index, refresh="wait_for")
+        if failed:
+            # 일부 문서가 빠진 인덱스로 교체하지 않음
+            raise RuntimeError(f"축소 인덱스 생성 실패 ({index_name}): {failed}개 문서 실패")
+
+    # 별칭 교체 시 투영 캐시도 비워짐
+    rebuild_index(es, index_name, fill, {"name": name, "method": method, "dims": dims, "version": version})
+    return recall_report(vectors, projection)
+
+# python -m module.vector_projection new_technology --dims 256
+if __name__ == '__main__':
+    from elasticsearch import Elasticsearch
+    from dotenv import load_dotenv
+    # search_rag 가 조회하는 RAG 인덱스 매핑 등록
+    import module.rag_retrieval
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="RAG 인덱스 벡터 차원 축소")
+    parser.add_argument("index_name")
+    parser.add_argument("--dims", type=int, default=256)
+    parser.add_argument("--method", choices=["pca", "random"], default="pca")
+    parser.add_argument("--version", type=int, default=1)
+    args = parser.parse_args()
+
+    es = Elasticsearch([os.getenv("elastic")])
+    build_projected_index(es, args.index_name, args.dims, args.method, args.version)
@@ -1,11 +1,7 @@
-from datetime import datetime, timedelta
-
 import requests
 import os
 from bs4 import BeautifulSoup
-from transformers import BertTokenizer, BertModel
-import torch
-from elasticsearch import Elasticsearch
+from module.rag_retrieval import search_rag
 import random
 from dotenv import load_dotenv
 import json
@@ -15,7 +11,6 @@ from openai import OpenAI
 load_dotenv()
 
 # 설정
-ELASTICSEARCH_HOST = os.getenv("elastic")
 API_KEY = os.getenv("API_KEY")
 GPT_MODEL = os.getenv("gpt")
 
@@ -26,117 +21,18 @@ if GPT_MODEL is None:
 
 client = OpenAI(api_key=API_KEY)
 
-# Elasticsearch 클라이언트 설정
-es = Elasticsearch([ELASTICSEARCH_HOST])
-
-# BERT 모델 및 토크나이저 불러오기
-tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
-model = BertModel.from_pretrained('bert-base-uncased')
-
-# 현재 날짜로 부터 30일 전 까지의 날짜 함수
-def get_date_range(days: int):
-    today = datetime.now()
-    start_date = today - timedelta(days=days)
-    return today.strftime("%Y-%m-%d"), start_date.strftime("%Y-%m-%d")
-
-# 질문을 벡터로 변환하는 함수
-def get_vector(text):
-    inputs = tokenizer(text, return_tensors='pt')
-    with torch.no_grad():
-        outputs = model(**inputs)
-    return outputs.last_hidden_state[0][0].numpy()
+# 질문 생성에 참고할 후보 문서 수와 그 중 프롬프트에 넣을 문서 수
+CANDIDATE_POOL_SIZE = 50
+SAMPLE_SIZE = 10
 
 # Elasticsearch에서 벡터 기반 검색을 수행하는 함수
-def searchDocs_generate(job: str, answers: str, index_name: str, type: str, explain=True, profile=True):
-    today_str, thirty_days_ago_str = get_date_range(30)
-
+def searchDocs_generate(job: str, answers: str, index_name: str, type: str, explain=None, profile=None, sample_size=None):
+    # sample_size 를 지정하면 상위 CANDIDATE_POOL_SIZE 개 후보 중 sample_size 개만 받아옴
     combined_query = f"{job} {answers}"
-    query_vector = get_vector(combined_query).tolist()
-    must_queries = []
-
-    if type == "behavioral":
-        must_queries.append({
-            "range": {
-                "date_field": {
-                    "gte": thirty_days_ago_str,
-                    "lte": today_str
-                }
-            }
-        })
-
-    must_queries.append({
-        "bool": {
-            "should": [
-                {
-                    "match": {
-                        "question": {
-                            "query": combined_query,
-                            "fuzziness": "AUTO"
-                        }
-                    }
-                },
-                {
-                    "script_score": {
-                        "query": {
-                            "match_all": {}
-                        },
-                        "script": {
-                            "source": "cosineSimilarity(params.query_vector, 'vector') + 1.0",
-                            "params": {
-                                "query_vector": query_vector
-                            }
-                        }
-                    }
-                }
-            ]
-        }
-    })
-
-    response = es.search(
-        index=index_name,
-        body={
-            "query": {
-                "bool": {
-                    "must": must_queries
-                }
-            },
-            "size": 50,
-            "explain": explain,
-            "profile": profile
-        }
-    )
-
-    hits = response['hits']['hits']
-    
-    # print("\n유사성 판단 근거:")
-    # for i, hit in enumerate(hits):
-    #     print(f"\n문서 {i+1}:")
-    #     print(f"질문: {hit['_source']['question']}")
-    #     print(f"유사도 점수: {hit['_score']:.2f}")
-    #
-    #     if '_explanation' in hit:
-    #         explanation = hit['_explanation']
-    #         print("유사성 판단 이유:")
-    #         print_human_readable_explanation(explanation)
-
+    hits = search_rag(index_name, combined_query, type, k=CANDIDATE_POOL_SIZE, source_fields=["question"],
+                      explain=explain, profile=profile, sample_size=sample_size)
     return [hit['_source']['question'] for hit in hits]
 
-def print_human_readable_explanation(explanation):
-    if 'description' in explanation:
-        desc = explanation['description'].lower()
-        if 'weight' in desc:
-            print(f"- 텍스트 매칭 점수: {explanation['value']:.2f}")
-        elif 'script score' in desc:
-            print(f"- 벡터 유사도 점수: {explanation['value']:.2f}")
-        elif 'sum of' in desc:
-            print(f"- 총 유사도 점수: {explanation['value']:.2f}")
-        elif 'product of' in desc:
-            print(f"- 최종 유사도 점수: {explanation['value']:.2f}")
-    
-    if 'details' in explanation:
-        for detail in explanation['details']:
-            print_human_readable_explanation(detail)
-
 def generate_questions(job, type, combined_context, num_questions):
     if type == "technical":
         prompt = f"""
@@ -274,12 +170,6 @@ def generate_questions(job, type, combined_context, num_questions):
     except json.JSONDecodeError as e:
         return {"error": f"JSON 파싱 오류: {e}"}
 
-# 크롤링 데이터 랜덤으로 가져오기
-def get_random_samples(data, sample_size=10):
-    samples = random.sample(data, min(sample_size, len(data)))
-    print(f"검색 문서 확인: {samples}")
-    return samples
-
 # 새로운 질문을 생성하는 함수
 def create_newQ(job: str, type: str, answers: str) -> dict:
     # type에 따라 INDEX_NAME 변경
@@ -290,10 +180,11 @@ def create_newQ(job: str, type: str, answers: str) -> dict:
     else:
         return {"error": "잘못된 type 값입니다. 'technical' 또는 'behavioral' 중 하나여야 합니다."}
 
-    related_docs = searchDocs_generate(job, answers, index_name, type)
+    # 후보 중 무작위 표본 추출은 검색 단계에서 처리
+    random_samples = searchDocs_generate(job, answers, index_name, type, sample_size=SAMPLE_SIZE)
 
-    if related_docs:
-        random_samples = get_random_samples(related_docs, sample_size=10)
+    if random_samples:
+        print(f"검색 문서 확인: {random_samples}")
         combined_context = " ".join(random_samples)
         num_questions = 10 if type == "technical" else 5
         # num_questions = 10
@@ -1,18 +1,14 @@
 import os
-from datetime import datetime, timedelta
-from elasticsearch import Elasticsearch
 import json
 from openai import OpenAI
 from dotenv import load_dotenv
 import time
-import torch
-from transformers import BertTokenizer, BertModel
+from module.rag_retrieval import search_rag
 
 # Load environment variables
 load_dotenv()
 
 # 설정
-ELASTICSEARCH_HOST = os.getenv("elastic")
 API_KEY = os.getenv("API_KEY")
 GPT_MODEL = os.getenv("gpt")
 
@@ -23,115 +19,11 @@ if GPT_MODEL is None:
 
 client = OpenAI(api_key=API_KEY)
 
-# Elasticsearch 클라이언트 설정
-es = Elasticsearch([ELASTICSEARCH_HOST])
-
-# BERT 모델 및 토크나이저 불러오기
-tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
-model = BertModel.from_pretrained('bert-base-uncased')
-
-# 질문을 벡터로 변환하는 함수
-def get_vector(text):
-    inputs = tokenizer(text, return_tensors='pt')
-    with torch.no_grad():
-        outputs = model(**inputs)
-    return outputs.last_hidden_state[0][0].numpy()
-
-# 현재 날짜로 부터 30일 전 까지의 날짜 함수
-def get_date_range(days: int):
-    today = datetime.now()
-    start_date = today - timedelta(days=days)
-    return today.strftime("%Y-%m-%d"), start_date.strftime("%Y-%m-%d")
-
 # Elasticsearch에서 벡터 기반 검색을 수행하는 함수
-def searchDocs_evaluate(answers: str, index_name: str, type: str, explain=True, profile=True):
-    today_str, thirty_days_ago_str = get_date_range(30)
-    query_vector = get_vector(answers).tolist()
-    must_queries = []
-
-    if type == "behavioral":
-        must_queries.append({
-            "range": {
-                "date_field": {
-                    "gte": thirty_days_ago_str,
-                    "lte": today_str
-                }
-            }
-        })
-
-    must_queries.append({
-        "bool": {
-            "should": [
-                {
-                    "match": {
-                        "question": {
-                            "query": answers,
-                            "fuzziness": "AUTO"
-                        }
-                    }
-                },
-                {
-                    "script_score": {
-                        "query": {
-                            "match_all": {}
-                        },
-                        "script": {
-                            "source": "cosineSimilarity(params.query_vector, 'vector') + 1.0",
-                            "params": {
-                                "query_vector": query_vector
-                            }
-                        }
-                    }
-                }
-            ]
-        }
-    })
-
-    response = es.search(
-        index=index_name,
-        body={
-            "query": {
-                "bool": {
-                    "must": must_queries
-                }
-            },
-            "size": 50,
-            "explain": explain,
-            "profile": profile
-        }
-    )
-
-    hits = response['hits']['hits']
-
-    # print("\n유사성 판단 근거:")
-    # for i, hit in enumerate(hits):
-    #     print(f"\n문서 {i+1}:")
-    #     print(f"질문: {hit['_source']['question']}")
-    #     print(f"유사도 점수: {hit['_score']:.2f}")
-    
-    #     if '_explanation' in hit:
-    #         explanation = hit['_explanation']
-    #         print("유사성 판단 이유:")
-    #         print_human_readable_explanation(explanation)
-
+def searchDocs_evaluate(answers: str, index_name: str, type: str, explain=None, profile=None):
+    hits = search_rag(index_name, answers, type, k=50, source_fields=["question"], explain=explain, profile=profile)
     return [hit['_source']['question'] for hit in hits]
 
-def print_human_readable_explanation(explanation):
-    if 'description' in explanation:
-        desc = explanation['description'].lower()
-        if 'weight' in desc:
-            print(f"- 텍스트 매칭 점수: {explanation['value']:.2f}")
-        elif 'script score' in desc:
-            print(f"- 벡터 유사도 점수: {explanation['value']:.2f}")
-        elif 'sum of' in desc:
-            print(f"- 총 유사도 점수: {explanation['value']:.2f}")
-        elif 'product of' in desc:
-            print(f"- 최종 유사도 점수: {explanation['value']:.2f}")
-
-    if 'details' in explanation:
-        for detail in explanation['details']:
-            print_human_readable_explanation(detail)
-
 def evaluate_answers(question, answer, years, job, type, combined_context, num_questions):
     if type == "technical":
         prompt = f"""
@@ -2,19 +2,13 @@ from openai import OpenAI
 import os
 from dotenv import load_dotenv
 import time
-from elasticsearch import Elasticsearch
-from transformers import BertTokenizer, BertModel
-import torch
-from datetime import datetime, timedelta
+from module.rag_retrieval import search_rag
 from difflib import SequenceMatcher
 import json
 
 # .env 파일에서 환경 변수 로드
 load_dotenv()
 
-ELASTICSEARCH_HOST = os.getenv("elastic")
-es = Elasticsearch([ELASTICSEARCH_HOST])
-
 # API 키 가져오기
 api_key = os.getenv("API_KEY")
 if api_key is None:
@@ -28,22 +22,6 @@ if gpt_model is None:
 # OpenAI 클라이언트 초기화 및 api키 등록
 client = OpenAI(api_key=api_key)
 
-# BERT 모델과 토크나이저 초기화
-tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
-model = BertModel.from_pretrained('bert-base-uncased')
-
-def get_bert_embedding(text):
-    inputs = tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=512)
-    with torch.no_grad():
-        outputs = model(**inputs)
-    embeddings = outputs.last_hidden_state[:, 0, :].numpy()
-    return embeddings.flatten().tolist()
-
-def get_date_range(days: int):
-    today = datetime.now()
-    start_date = today - timedelta(days=days)
-    return today.strftime("%Y-%m-%d"), start_date.strftime("%Y-%m-%d")
-
 def text_similarity(a, b):
     return SequenceMatcher(None, a, b).ratio()
 
@@ -54,7 +32,7 @@ def remove_duplicates(questions, similarity_threshold=0.8):
             unique_questions.append(question)
     return unique_questions
 
-def ragFollwUp(job: str, type: str, questionsRag: str, answerRag: str, explain=True, profile=True):
+def ragFollwUp(job: str, type: str, questionsRag: str, answerRag: str, explain=None, profile=None):
     # type에 따른 인덱스 선택
     if type == 'technical':
         index_name = 'new_technology'
@@ -63,69 +41,14 @@ def ragFollwUp(job: str, type: str, questionsRag: str, answerRag: str, explain=T
     else:
         return {"error": "잘못된 type 값입니다. 'technical' 또는 'behavioral' 중 하나여야 합니다."}
 
-    today_str, thirty_days_ago_str = get_date_range(30)
-
     combined_query = f"{questionsRag}"
-    query_vector = get_bert_embedding(combined_query)
-    must_queries = []
-
-    if type == "behavioral":
-        must_queries.append({
-            "range": {
-                "date_field": {
-                    "gte": thirty_days_ago_str,
-                    "lte": today_str
-                }
-            }
-        })
-
-    must_queries.append({
-        "bool": {
-            "should": [
-                {
-                    "match": {
-                        "question": {
-                            "query": combined_query,
-                            "fuzziness": "AUTO"
-                        }
-                    }
-                },
-                {
-                    "script_score": {
-                        "query": {
-                            "match_all": {}
-                        },
-                        "script": {
-                            "source": "cosineSimilarity(params.query_vector, 'vector') + 1.0",
-                            "params": {
-                                "query_vector": query_vector
-                            }
-                        }
-                    }
-                }
-            ]
-        }
-    })
 
     try:
-        response = es.search(
-            index=index_name,
-            body={
-                "query": {
-                    "bool": {
-                        "must": must_queries
-                    }
-                },
-                "size": 1,  # 가장 높은 점수의 결과 하나만 가져옵니다.
-                "explain": explain,
-                "profile": profile
-            }
-        )
+        hits = search_rag(index_name, combined_query, type, k=1, source_fields=["original"], explain=explain, profile=profile)  # 가장 높은 점수의 결과 하나만 가져옵니다.
     except Exception as e:
         print(f"Elasticsearch 검색 중 오류 발생: {str(e)}")
         return {"error": "검색 중 오류가 발생했습니다."}
 
-    hits = response['hits']['hits']
     if not hits:
         return {"error": "No search results found."}
 